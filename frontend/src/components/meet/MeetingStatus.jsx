@@ -81,12 +81,8 @@ const MeetingStatus = () => {
         setAudioBlob(blob);
   
         try {
-          const formData = new FormData();
-          formData.append('file', blob, 'meeting-audio.webm');
-  
-          const res = await axios.post('https://eae3-34-87-64-3.ngrok-free.app/graph', formData);
-          console.log(res);
-          setGraphData(res.data);
+          const graph = await generateGraph(blob);
+          setGraphData(graph);
           setShowGraphModal(true);
           toast.success('Knowledge graph generated');
         } catch (err) {
@@ -136,15 +132,30 @@ const MeetingStatus = () => {
 
 
 
+  // Uploads the recording and polls the background job until the graph is ready
+  const generateGraph = async (blob) => {
+    const headers = { Authorization: `Bearer ${localStorage.getItem('token')}` };
+    const formData = new FormData();
+    formData.append('audio', blob, 'meeting-audio.webm');
+    formData.append('meeting_id', selectedMeeting.id);
+
+    let { data } = await axios.post('http://localhost:5000/api/graph', formData, { headers });
+    while (data.job.status !== 'done') {
+      if (data.job.status === 'failed') {
+        throw new Error(data.job.error || 'Knowledge graph generation failed');
+      }
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      ({ data } = await axios.get(`http://localhost:5000/api/graph-jobs/${data.job.id}`, { headers }));
+    }
+    return data.job.result;
+  };
+
   const handleGenerateGraph = async () => {
     if (!audioBlob) return;
 
-    const formData = new FormData();
-    formData.append('audio', audioBlob, 'meeting-audio.webm');
-
     try {
-      const res = await axios.post('http://localhost:5000/api/graph', formData);
-      setGraphData(res.data);
+      const graph = await generateGraph(audioBlob);
+      setGraphData(graph);
       setShowGraphModal(true);
     } catch (err) {
       console.error(err);
@@ -1,29 +1,41 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from werkzeug.security import generate_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
 import os
 
 from config import config
-from models import db, User
-from routes import auth_bp, visitor_bp, dashboard_bp, meeting_bp, chat_bp
+from models import db
+from routes import auth_bp, visitor_bp, dashboard_bp, meeting_bp, chat_bp, badge_bp, site_bp, occupancy_bp, kiosk_bp
+from utils import badge_renderer, visitor_sweep_scheduler, rate_limiter, site_router, assistant, graph_job_runner
 
 def create_app(config_name='default'):
+    # No database or filesystem work happens here: every worker builds the app,
+    # so schema creation, migrations and seeding live in manage.py instead.
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     # app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB limit
 
+    # Behind a reverse proxy, take the client address from X-Forwarded-For
+    # (rate limiting of anonymous callers is keyed by it)
+    if app.config['PROXY_FIX_HOPS']:
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
     # Set JWT access token expiration to 1 hour
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=10)
     
     # Initialize extensions
-    CORS(app, supports_credentials=True, origins=["*"], allow_headers=["Content-Type", "Authorization"])
+    CORS(app, supports_credentials=True, origins=["*"], allow_headers=["Content-Type", "Authorization", "X-Site", "Idempotency-Key"])
+    site_router.init_app(app)  # Adds the per-site binds, so it must run before db.init_app
     db.init_app(app)
     jwt = JWTManager(app)
-    
-    # Ensure upload directory exists
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    badge_renderer.init_app(app)
+    visitor_sweep_scheduler.init_app(app)
+    rate_limiter.init_app(app)
+    assistant.init_app(app)
+    graph_job_runner.init_app(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -31,11 +43,14 @@ def create_app(config_name='default'):
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(meeting_bp)
     app.register_blueprint(chat_bp)
+    app.register_blueprint(badge_bp)
+    app.register_blueprint(site_bp)
+    app.register_blueprint(occupancy_bp)
+    app.register_blueprint(kiosk_bp)
     
-    # Initialize database
-    with app.app_context():
-        db.create_all()
-        initialize_database()
+    # Start background sweeps (skip the reloader's parent process in debug mode)
+    if app.config['SCHEDULER_ENABLED'] and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        visitor_sweep_scheduler.start()
     
     @app.route('/')
     def home():
@@ -43,20 +58,13 @@ def create_app(config_name='default'):
     
     return app
 
-def initialize_database():
-    # Create admin user if it doesn't exist
-    admin = User.query.filter_by(username='admin').first()
-    if not admin:
-        admin = User(
-            username='admin',
-            email='admin@example.com',
-            password=generate_password_hash('admin123'),  # Change this in production
-            department='Administration',
-            role='admin'
-        )
-        db.session.add(admin)
-        db.session.commit()
-
 if __name__ == '__main__':
+    from utils.bootstrap import ensure_folders, migrate_schema, seed_admin
+
     app = create_app('development')
+    # Keep `python app.py` working out of the box for local development
+    with app.app_context():
+        ensure_folders()
+        migrate_schema()
+        seed_admin()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Startup-time benchmark for ``create_app``.
+
+Every gunicorn worker, test and management script builds the app once, so
+the numbers that matter are a cold start in a fresh interpreter (imports
+included) and a warm ``create_app()`` call in an already loaded process.
+
+Usage (from the ``server`` directory):
+    python benchmarks/bench_startup.py [--runs 10] [--workers 4]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter against a throwaway SQLite file and prints the
+# seconds spent importing the app module and calling create_app()
+COLD_START = """
+import os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+import config
+config.config['bench'] = type('BenchConfig', (config.ProductionConfig,), {{
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join({tmp_dir!r}, 'bench.db'),
+    'UPLOAD_FOLDER': os.path.join({tmp_dir!r}, 'photos'),
+    'SCHEDULER_ENABLED': False,
+}})
+from app import create_app
+imported = time.perf_counter()
+create_app('bench')
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def cold_start(tmp_dir):
+    code = COLD_START.format(server_dir=SERVER_DIR, tmp_dir=tmp_dir)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=tmp_dir, check=True,
+        capture_output=True, text=True
+    ).stdout.split()
+    return float(output[-2]), float(output[-1])
+
+
+def warm_start(runs, tmp_dir):
+    sys.path.insert(0, SERVER_DIR)
+    import config
+    config.config['bench'] = type('BenchConfig', (config.ProductionConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp_dir, 'bench.db'),
+        'UPLOAD_FOLDER': os.path.join(tmp_dir, 'photos'),
+        'SCHEDULER_ENABLED': False,
+    })
+    from app import create_app
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        create_app('bench')
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<28} median {statistics.median(timings) * 1000:8.1f} ms"
+          f"   min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4,
+                        help='simulated gunicorn workers booting at the same time')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cold = [cold_start(tmp_dir) for _ in range(args.runs)]
+        report('cold import', [imported for imported, _ in cold])
+        report('cold create_app()', [created for _, created in cold])
+        report('cold total', [imported + created for imported, created in cold])
+
+        # All workers boot at once and share the same SQLite file
+        started = time.perf_counter()
+        procs = [
+            subprocess.Popen(
+                [sys.executable, '-c', COLD_START.format(server_dir=SERVER_DIR, tmp_dir=tmp_dir)],
+                cwd=tmp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            for _ in range(args.workers)
+        ]
+        for proc in procs:
+            proc.wait()
+        print(f"{args.workers} workers booting together   {(time.perf_counter() - started) * 1000:8.1f} ms wall")
+
+        report('warm create_app()', warm_start(args.runs, tmp_dir))
+
+
+if __name__ == '__main__':
+    main()
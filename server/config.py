@@ -6,6 +6,85 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = 'your-secret-key'  # Change this in production
     UPLOAD_FOLDER = 'visitor_photos'
+    VISITOR_BATCH_LIMIT = 500  # Visitors per batch approve/reject
+
+    # Server-side QR/badge rendering
+    BADGE_CACHE_FOLDER = 'badge_cache'
+    BADGE_CACHE_SIZE = 512  # Rendered PNGs kept in memory per worker
+    BADGE_CHECKIN_URL = 'http://localhost:5000/api/visitors/{visitor_id}/check-in'
+    BADGE_BATCH_LIMIT = 1000
+
+    # Background sweeps of expired approvals and stale check-ins
+    SCHEDULER_ENABLED = True
+    SCHEDULER_INTERVAL_SECONDS = 60
+    SWEEP_BATCH_SIZE = 500  # Rows per UPDATE, keeps the SQLite write lock short
+    STALE_CHECKIN_HOURS = 12
+
+    # Rate limiting and load shedding
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE = 'memory'  # or 'file:/path/ratelimit.db' to share buckets between workers
+    RATELIMIT_CAPACITY = 60  # Tokens per caller and priority class
+    RATELIMIT_REFILL_RATE = 1.0  # Tokens per second
+    RATELIMIT_COSTS = {
+        'auth.login': 10,  # Every attempt runs a password hash
+        'auth.register': 10,
+        'dashboard.get_dashboard_stats': 10,
+        'chat.stream_chat_message': 5,
+        'visitor.get_visitors': 5,
+        'badge.render_badge_batch': 20,
+        'visitor.batch_update_visitor_status': 5,
+        'kiosk.post_check_in_events': 5,
+    }
+    RATELIMIT_PRIORITIES = {
+        'visitor.check_in_visitor': 'critical',
+        'visitor.check_out_visitor': 'critical',
+        'kiosk.post_check_in_events': 'critical',
+        'dashboard.get_dashboard_stats': 'low',
+        'dashboard.get_maintenance_stats': 'low',
+        'visitor.get_visitors': 'low',
+        'meeting.stream_graph_job_events': 'low',
+    }
+    RATELIMIT_SHED_LIMITS = {'low': 4, 'normal': 16}  # Requests in flight per worker
+    RATELIMIT_MAX_BUCKETS = 10000  # Per worker with 'memory' storage
+    PROXY_FIX_HOPS = 0  # Reverse proxies in front of the app, trusted for X-Forwarded-For
+
+    # Multi-site support. Sites listed in SITE_DATABASES keep their visitors and
+    # meetings in their own database; the others share SQLALCHEMY_DATABASE_URI.
+    SITES = ['default']
+    SITE_DATABASES = {}  # e.g. {'hq': 'sqlite:///site_hq.db'}
+    SITE_FANOUT_WORKERS = 8  # Threads used by cross-site admin queries
+
+    # Server-side chat assistant
+    ASSISTANT_PROVIDER = os.environ.get('ASSISTANT_PROVIDER', 'openai')  # 'openai' or 'stub'
+    ASSISTANT_API_URL = 'https://api.groq.com/openai/v1/chat/completions'
+    ASSISTANT_API_KEY = os.environ.get('ASSISTANT_API_KEY')
+    ASSISTANT_MODEL = 'llama3-8b-8192'
+    ASSISTANT_HISTORY_WINDOW = 5  # Previous messages sent with every question
+    ASSISTANT_CACHE_SIZE = 256
+    ASSISTANT_CACHE_TTL = 3600  # Seconds
+
+    # Knowledge graphs from meeting audio
+    GRAPH_PIPELINE = os.environ.get('GRAPH_PIPELINE', 'stub')  # 'stub' or 'http'
+    GRAPH_PIPELINE_URL = os.environ.get('GRAPH_PIPELINE_URL')  # Used by the 'http' pipeline
+    GRAPH_AUDIO_FOLDER = 'meeting_audio'
+    GRAPH_MAX_AUDIO_BYTES = 200 * 1024 * 1024
+    GRAPH_WORKERS = 2  # Processes per web worker
+    GRAPH_MP_START_METHOD = 'spawn'
+    GRAPH_POLL_SECONDS = 5  # Dispatcher check for queued jobs
+    GRAPH_EVENTS_POLL_SECONDS = 1
+    GRAPH_JOB_TIMEOUT = 30 * 60  # Seconds before a running job is retried
+    GRAPH_MAX_ATTEMPTS = 3
+    GRAPH_RESULT_CACHE_SIZE = 128  # Meetings
+
+    # Idempotency-Key support for registration and meeting requests
+    IDEMPOTENCY_TTL = 24 * 60 * 60  # Seconds a stored response is replayed
+    IDEMPOTENCY_MAX_KEYS = 100000  # Oldest keys beyond this are purged by the sweep
+    IDEMPOTENCY_WAIT_SECONDS = 10  # How long a concurrent duplicate waits for the first request
+    IDEMPOTENCY_LOCK_TIMEOUT = 60  # Seconds before an unfinished key is taken over
+
+    # Kiosk sync
+    KIOSK_SYNC_PAGE_SIZE = 500  # Changed visitors per delta response
+    KIOSK_MAX_EVENTS = 500  # Check-in events per batch
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,102 @@
+"""
+Management commands for schema creation, migrations and seeding.
+
+The app factory does no database work, so run these once per deployment
+(not once per worker) before starting the server:
+
+    python manage.py bootstrap
+    python manage.py migrate --config production
+"""
+import click
+from flask import Flask
+
+from config import config
+from models import db
+from utils.bootstrap import ensure_folders, create_schema, migrate_schema, seed_admin, SchemaMigrationError
+from utils.sites import configure_site_binds
+
+
+def create_cli_app(config_name):
+    # Only config and the database (including every site database);
+    # blueprints and background jobs are not needed to manage the schema
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    configure_site_binds(app)
+    db.init_app(app)
+    return app
+
+
+config_option = click.option(
+    '--config', 'config_name', default='default', show_default=True,
+    type=click.Choice(list(config)), help='Configuration to load.'
+)
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command('init-db')
+@config_option
+def init_db(config_name):
+    """Create all missing tables."""
+    with create_cli_app(config_name).app_context():
+        create_schema()
+    click.echo('Database tables created')
+
+
+@cli.command('migrate')
+@config_option
+def migrate(config_name):
+    """Add missing tables, columns and indexes to an existing database."""
+    with create_cli_app(config_name).app_context():
+        try:
+            applied = migrate_schema()
+        except SchemaMigrationError as e:
+            for change in e.applied:
+                click.echo(change)
+            raise click.ClickException(str(e))
+    for change in applied:
+        click.echo(change)
+    click.echo(f"{len(applied)} change(s) applied")
+
+
+admin_options = [
+    click.option('--username', envvar='ADMIN_USERNAME', default='admin', show_default=True),
+    click.option('--password', envvar='ADMIN_PASSWORD', default='admin123'),
+    click.option('--email', envvar='ADMIN_EMAIL', default='admin@example.com', show_default=True),
+]
+
+
+def with_admin_options(command):
+    for option in reversed(admin_options):
+        command = option(command)
+    return command
+
+
+@cli.command('seed-admin')
+@config_option
+@with_admin_options
+def seed_admin_command(config_name, username, password, email):
+    """Create the admin user if it doesn't exist."""
+    with create_cli_app(config_name).app_context():
+        created = seed_admin(username, password, email)
+    click.echo(f"Admin user '{username}' {'created' if created else 'already exists'}")
+
+
+@cli.command('bootstrap')
+@config_option
+@with_admin_options
+@click.pass_context
+def bootstrap(ctx, config_name, username, password, email):
+    """Create folders, migrate the schema and seed the admin user."""
+    with create_cli_app(config_name).app_context():
+        ensure_folders()
+    ctx.invoke(migrate, config_name=config_name)
+    ctx.invoke(seed_admin_command, config_name=config_name, username=username,
+               password=password, email=email)
+
+
+if __name__ == '__main__':
+    cli()
@@ -1,9 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from .routing import SiteRoutingSession
+
+# The routing session sends site-partitioned tables to the current site's bind
+db = SQLAlchemy(session_options={'class_': SiteRoutingSession})
 
 # Import models after db is defined to avoid circular imports
 from .user import User
 from .visitor import Visitor
 from .meeting import MeetingRequest, MeetingRecipient
-from .chat import ChatMessage
\ No newline at end of file
+from .chat import ChatMessage
+from .scheduler import SchedulerLease
+from .graph_job import GraphJob
+from .idempotency import IdempotencyKey
+from .occupancy import OccupancyCounter, OnSiteVisitor
+from .sync import VisitorChange
\ No newline at end of file
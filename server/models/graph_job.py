@@ -0,0 +1,46 @@
+from . import db
+from datetime import datetime
+import json
+
+class GraphJob(db.Model):
+    """
+    Knowledge-graph generation for a recorded meeting. Audio is uploaded in
+    chunks ('uploading'), then processed in the background
+    ('queued' -> 'running' -> 'done' or 'failed').
+    """
+    __tablename__ = 'graph_job'
+    __table_args__ = (
+        db.Index('ix_graph_job_status', 'status'),
+        db.Index('ix_graph_job_meeting_status', 'site', 'meeting_id', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # The meeting may live in a site database, so this is not a foreign key
+    meeting_id = db.Column(db.Integer, nullable=False)
+    site = db.Column(db.String(50), nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), default='uploading')  # uploading, queued, running, done, failed
+    audio_path = db.Column(db.String(255), nullable=False)
+    bytes_received = db.Column(db.Integer, default=0)
+    attempts = db.Column(db.Integer, default=0)
+    result = db.Column(db.Text)  # JSON: transcript, nodes, edges, html
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self, include_result=False):
+        data = {
+            'id': self.id,
+            'meeting_id': self.meeting_id,
+            'status': self.status,
+            'bytes_received': self.bytes_received,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_result:
+            data['result'] = json.loads(self.result) if self.result else None
+        return data
@@ -0,0 +1,17 @@
+from . import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """
+    Stored response of a request sent with an ``Idempotency-Key`` header, so
+    retries replay it instead of running the request again.
+    """
+    __tablename__ = 'idempotency_key'
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of user, site, endpoint and client key
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status = db.Column(db.String(20), default='in_progress')  # in_progress, done
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
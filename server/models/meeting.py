@@ -1,8 +1,10 @@
 from . import db
+from .routing import current_site, DEFAULT_SITE
 from datetime import datetime
 
 class MeetingRequest(db.Model):
     __tablename__ = 'meeting_request'
+    __table_args__ = {'info': {'site_partitioned': True}}
     
     id = db.Column(db.Integer, primary_key=True)
     requestor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -12,6 +14,7 @@ class MeetingRequest(db.Model):
     google_meet_link = db.Column(db.String(255), nullable=False)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    site = db.Column(db.String(50), nullable=False, default=current_site, server_default=DEFAULT_SITE, index=True)
     
     # Relationship to the recipients
     recipients = db.relationship('MeetingRecipient', backref='meeting', cascade="all, delete-orphan")
@@ -26,11 +29,13 @@ class MeetingRequest(db.Model):
             'google_meet_link': self.google_meet_link,
             'notes': self.notes,
             'created_at': self.created_at.isoformat(),
+            'site': self.site,
             'recipients': [r.to_dict() for r in self.recipients]
         }
 
 class MeetingRecipient(db.Model):
     __tablename__ = 'meeting_recipient'
+    __table_args__ = {'info': {'site_partitioned': True}}  # Stored with its meeting
     
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meeting_request.id'), nullable=False)
@@ -0,0 +1,45 @@
+from . import db
+from datetime import datetime
+
+class OccupancyCounter(db.Model):
+    """
+    Number of visitors currently on site, per site, host and department.
+    Kept up to date on every check-in/check-out (see utils.occupancy).
+    """
+    __tablename__ = 'occupancy_counter'
+    __table_args__ = {'info': {'site_partitioned': True}}
+
+    site = db.Column(db.String(50), primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)  # site, host, department
+    value = db.Column(db.String(100), primary_key=True)  # '' for site, host id or department name
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OnSiteVisitor(db.Model):
+    """
+    Visitors currently checked in, with what a roll call needs.
+    """
+    __tablename__ = 'on_site_visitor'
+    __table_args__ = (
+        db.Index('ix_on_site_visitor_site', 'site'),
+        {'info': {'site_partitioned': True}}
+    )
+
+    visitor_id = db.Column(db.Integer, db.ForeignKey('visitor.id'), primary_key=True)
+    site = db.Column(db.String(50), nullable=False)
+    full_name = db.Column(db.String(100), nullable=False)
+    badge_id = db.Column(db.String(50))
+    host_id = db.Column(db.Integer, nullable=False)
+    department = db.Column(db.String(100))
+    checked_in_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'visitor_id': self.visitor_id,
+            'full_name': self.full_name,
+            'badge_id': self.badge_id,
+            'host_id': self.host_id,
+            'department': self.department,
+            'checked_in_at': self.checked_in_at.isoformat() if self.checked_in_at else None
+        }
@@ -0,0 +1,75 @@
+import contextlib
+import contextvars
+
+import sqlalchemy as sa
+from flask_sqlalchemy.session import Session
+
+DEFAULT_SITE = 'default'
+
+# site_scope(MAIN_DATABASE) makes site-partitioned tables use the main database,
+# e.g. for maintenance that covers every site without a database of its own
+MAIN_DATABASE = None
+
+# Site of the current request or background task. Set from the JWT for every
+# request (see utils.sites) and with site_scope() everywhere else.
+_current_site = contextvars.ContextVar('current_site', default=DEFAULT_SITE)
+
+
+def current_site():
+    return _current_site.get()
+
+
+@contextlib.contextmanager
+def site_scope(site):
+    token = _current_site.set(site)
+    try:
+        yield site
+    finally:
+        _current_site.reset(token)
+
+
+def set_current_site(site):
+    """
+    Set the site for the rest of the current context. Returns a token for
+    ``reset_current_site``.
+    """
+    return _current_site.set(site)
+
+
+def reset_current_site(token):
+    _current_site.reset(token)
+
+
+def site_bind_key(site):
+    return f"site_{site}"
+
+
+def is_site_partitioned(table):
+    return table.info.get('site_partitioned', False)
+
+
+def _clause_tables(clause):
+    if isinstance(clause, sa.Table):
+        return [clause]
+    if isinstance(clause, sa.UpdateBase) and isinstance(clause.table, sa.Table):
+        return [clause.table]
+    if isinstance(clause, sa.Select):
+        return [f for f in clause.get_final_froms() if isinstance(f, sa.Table)]
+    return []
+
+
+class SiteRoutingSession(Session):
+    """
+    Session that sends queries on site-partitioned tables (marked with
+    ``info={'site_partitioned': True}``) to the current site's bind, if the
+    site has its own database. Everything else uses the normal bind lookup.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = self._db.engines.get(site_bind_key(current_site()))
+            if engine is not None:
+                tables = [sa.inspect(mapper).local_table] if mapper is not None else _clause_tables(clause)
+                if tables and all(is_site_partitioned(table) for table in tables):
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,24 @@
+from . import db
+import json
+
+class SchedulerLease(db.Model):
+    """
+    One row per background task. Workers compete for the lease so only one of
+    them runs the task at a time, and the winner records its last-run stats.
+    """
+    __tablename__ = 'scheduler_lease'
+
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime)
+    last_stats = db.Column(db.Text)  # JSON encoded stats of the last run
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'owner': self.owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_stats': json.loads(self.last_stats) if self.last_stats else None
+        }
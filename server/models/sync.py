@@ -0,0 +1,35 @@
+from . import db
+from .visitor import Visitor
+from datetime import datetime
+
+class VisitorChange(db.Model):
+    """
+    Change-log behind the kiosk delta sync. Every insert or update of a
+    visitor appends a row, and ``seq`` only ever grows, so a kiosk asks for
+    the changes after the last ``seq`` it has seen. Only the newest row per
+    visitor matters; older ones are compacted by the sweep.
+    """
+    __tablename__ = 'visitor_change'
+    __table_args__ = (
+        db.Index('ix_visitor_change_site_seq', 'site', 'seq'),
+        db.Index('ix_visitor_change_visitor_id', 'visitor_id'),
+        # Never hand out a seq again, even after the newest rows were deleted
+        {'info': {'site_partitioned': True}, 'sqlite_autoincrement': True}
+    )
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    site = db.Column(db.String(50), nullable=False)
+    visitor_id = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+@db.event.listens_for(Visitor, 'after_insert')
+@db.event.listens_for(Visitor, 'after_update')
+def log_visitor_change(mapper, connection, target):
+    # Runs inside the flush, on the visitor's own connection and transaction.
+    # Bulk UPDATEs bypass this and log with utils.sync.log_visitor_changes.
+    connection.execute(VisitorChange.__table__.insert().values(
+        site=target.site,
+        visitor_id=target.id,
+        changed_at=datetime.utcnow()
+    ))
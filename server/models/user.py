@@ -1,4 +1,5 @@
 from . import db
+from .routing import current_site, DEFAULT_SITE
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -7,6 +8,7 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)
     department = db.Column(db.String(100))
     role = db.Column(db.String(20), default='employee')  # admin, employee, security
+    site = db.Column(db.String(50), nullable=False, default=current_site, server_default=DEFAULT_SITE, index=True)  # Home site
     
     def to_dict(self):
         return {
@@ -14,5 +16,6 @@ class User(db.Model):
             'username': self.username,
             'email': self.email,
             'department': self.department,
-            'role': self.role
+            'role': self.role,
+            'site': self.site
         }
\ No newline at end of file
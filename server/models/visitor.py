@@ -1,7 +1,13 @@
 from . import db
+from .routing import current_site, DEFAULT_SITE
 from datetime import datetime
 
 class Visitor(db.Model):
+    __table_args__ = (
+        db.Index('ix_visitor_site_status', 'site', 'status'),
+        {'info': {'site_partitioned': True}}
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120))
@@ -17,6 +23,8 @@ class Visitor(db.Model):
     pre_approved = db.Column(db.Boolean, default=False)
     approval_window_start = db.Column(db.DateTime)
     approval_window_end = db.Column(db.DateTime)
+    approved_at = db.Column(db.DateTime)
+    site = db.Column(db.String(50), nullable=False, default=current_site, server_default=DEFAULT_SITE)
     
     def to_dict(self):
         return {
@@ -34,5 +42,7 @@ class Visitor(db.Model):
             'pre_approved': self.pre_approved,
             'approval_window_start': self.approval_window_start.isoformat() if self.approval_window_start else None,
             'approval_window_end': self.approval_window_end.isoformat() if self.approval_window_end else None,
-            'photo_path': self.photo_path  # Ensure photo_path is included
+            'approved_at': self.approved_at.isoformat() if self.approved_at else None,
+            'photo_path': self.photo_path,  # Ensure photo_path is included
+            'site': self.site
         }
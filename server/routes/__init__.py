@@ -6,6 +6,10 @@ visitor_bp = Blueprint('visitor', __name__, url_prefix='/api')
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api')
 meeting_bp = Blueprint('meeting', __name__, url_prefix='/api')
 chat_bp = Blueprint('chat', __name__, url_prefix='/api')
+badge_bp = Blueprint('badge', __name__, url_prefix='/api')
+site_bp = Blueprint('site', __name__, url_prefix='/api')
+occupancy_bp = Blueprint('occupancy', __name__, url_prefix='/api')
+kiosk_bp = Blueprint('kiosk', __name__, url_prefix='/api')
 
 
 # Import routes after blueprints are defined
@@ -13,4 +17,8 @@ from .auth_routes import *
 from .visitor_routes import *
 from .dashboard_routes import *
 from .meeting_routes import *
-from .chat_routes import *
\ No newline at end of file
+from .chat_routes import *
+from .badge_routes import *
+from .site_routes import *
+from .occupancy_routes import *
+from .kiosk_routes import *
\ No newline at end of file
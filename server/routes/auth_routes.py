@@ -4,6 +4,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 from . import auth_bp
 from models import db, User
+from models.routing import DEFAULT_SITE
+from utils.sites import known_sites
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -16,13 +18,18 @@ def register():
     if User.query.filter_by(email=data['email']).first():
         return jsonify({'message': 'Email already exists'}), 400
     
+    site = data.get('site', DEFAULT_SITE)
+    if site not in known_sites():
+        return jsonify({'message': 'Unknown site'}), 400
+    
     # Create new user
     new_user = User(
         username=data['username'],
         email=data['email'],
         password=generate_password_hash(data['password']),
         department=data.get('department', ''),
-        role=data.get('role', 'employee')
+        role=data.get('role', 'employee'),
+        site=site
     )
     
     db.session.add(new_user)
@@ -36,7 +43,11 @@ def login():
     user = User.query.filter_by(username=data['username']).first()
     
     if user and check_password_hash(user.password, data['password']):
-        access_token = create_access_token(identity=str(user.id))
+        # The site claim routes every later request to the user's site
+        access_token = create_access_token(
+            identity=str(user.id),
+            additional_claims={'site': user.site, 'role': user.role}
+        )
         return jsonify({
             'access_token': access_token,
             'user': user.to_dict()
@@ -0,0 +1,111 @@
+import io
+import zipfile
+
+from flask import request, jsonify, current_app, make_response, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from . import badge_bp
+from models import User, Visitor
+from models.routing import current_site
+from utils.badges import badge_renderer, BADGE_KINDS
+from utils.sites import get_for_site_or_404
+
+# Badge ids are never reused, so a rendered badge never changes
+BADGE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def _png_response(png, badge_id, kind):
+    response = make_response(png)
+    response.headers['Content-Type'] = 'image/png'
+    response.headers['Cache-Control'] = BADGE_CACHE_CONTROL
+    response.set_etag(f"{badge_id}-{kind}")
+    return response
+
+
+def _sees_all_visitors(user):
+    # Same rule as GET /visitors/<id>: admins and security see every badge,
+    # employees only those of their own visitors
+    return user.role in ['admin', 'security']
+
+
+@badge_bp.route('/badges/<string:badge_id>.png', methods=['GET'])
+@jwt_required()
+def get_badge_image(badge_id):
+    """
+    Serve the QR code (``?kind=qr``, default) or the printable badge
+    (``?kind=badge``) for a visitor.
+    """
+    kind = request.args.get('kind', 'qr')
+    if kind not in BADGE_KINDS:
+        return jsonify({'message': 'Invalid badge kind'}), 400
+
+    # Only badges of the current site, even when the PNG is already cached
+    visitor = get_for_site_or_404(Visitor, badge_id=badge_id)
+    current_user_id = int(get_jwt_identity())
+    if visitor.host_id != current_user_id and not _sees_all_visitors(User.query.get(current_user_id)):
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    if request.if_none_match.contains(f"{badge_id}-{kind}"):
+        return '', 304
+
+    png = badge_renderer.get(badge_id, kind)
+    if png is None:
+        png = badge_renderer.render(visitor, kind)
+
+    return _png_response(png, badge_id, kind)
+
+
+@badge_bp.route('/badges/batch', methods=['POST'])
+@jwt_required()
+def render_badge_batch():
+    """
+    Render badges for many visitors in one request, e.g. for printing the
+    badges of a bulk pre-approved event.
+    Expected JSON payload:
+    {
+        "visitor_ids": [1, 2, 3],
+        "kind": "badge"
+    }
+    Returns a ZIP archive with one ``<badge_id>.png`` per visitor the
+    current user may see.
+    """
+    data = request.json or {}
+    visitor_ids = data.get('visitor_ids', [])
+    kind = data.get('kind', 'badge')
+
+    if not visitor_ids or not isinstance(visitor_ids, list):
+        return jsonify({'message': 'At least one visitor id is required'}), 400
+    if any(type(visitor_id) is not int for visitor_id in visitor_ids):
+        return jsonify({'message': 'Visitor ids must be integers'}), 400
+    if len(visitor_ids) > current_app.config['BADGE_BATCH_LIMIT']:
+        return jsonify({'message': 'Too many visitors in one batch'}), 400
+    if kind not in BADGE_KINDS:
+        return jsonify({'message': 'Invalid badge kind'}), 400
+
+    # One query for the whole batch instead of one per badge
+    current_user_id = int(get_jwt_identity())
+    query = Visitor.query.filter(
+        Visitor.site == current_site(),
+        Visitor.id.in_(visitor_ids),
+        Visitor.badge_id.isnot(None)
+    )
+    if not _sees_all_visitors(User.query.get(current_user_id)):
+        query = query.filter(Visitor.host_id == current_user_id)
+    visitors = query.order_by(Visitor.id).all()
+
+    if not visitors:
+        return jsonify({'message': 'No visitors found'}), 404
+
+    archive = io.BytesIO()
+    # PNGs are already compressed, storing them avoids a second deflate pass
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zf:
+        for visitor in visitors:
+            zf.writestr(f"{visitor.badge_id}.png", badge_renderer.render(visitor, kind))
+    archive.seek(0)
+
+    return send_file(
+        archive,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name='badges.zip'
+    )
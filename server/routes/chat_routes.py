@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+import json
 from models import db, ChatMessage
+from utils.assistant import assistant
 
 from . import chat_bp
 
@@ -66,4 +68,88 @@ def get_system_context():
         query = query.filter_by(path=path)
         
     messages = query.order_by(ChatMessage.timestamp.desc()).limit(1).all()
-    return jsonify({'messages': [msg.to_dict() for msg in messages]}), 200
\ No newline at end of file
+    return jsonify({'messages': [msg.to_dict() for msg in messages]}), 200
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@chat_bp.route('/chat/stream', methods=['POST'])
+@jwt_required()
+def stream_chat_message():
+    """
+    Answer a chat message through the server-side assistant and stream the
+    answer back as server-sent events.
+    Expected JSON payload:
+    {
+        "content": "How do I check in a visitor?",
+        "path": "/visitors/check-in",
+        "system": "Optional page context, stored if it changed"
+    }
+    Emits ``token`` events with text chunks, then one ``done`` event with the
+    stored assistant message. Both turns are saved once the stream completes.
+    """
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+    question = (data.get('content') or '').strip()
+    path = data.get('path', '')
+    if not question:
+        return jsonify({'message': 'Message content is required'}), 400
+
+    # Latest system context for this page, replaced if the client sent a new one
+    system_message = ChatMessage.query.filter_by(user_id=current_user_id, role='system', path=path) \
+        .order_by(ChatMessage.timestamp.desc()).first()
+    system = data.get('system')
+    new_system = bool(system) and (system_message is None or system_message.content != system)
+    if not new_system and system_message is not None:
+        system = system_message.content
+
+    # Bounded window of the conversation so far, oldest first
+    window = ChatMessage.query.filter(
+        ChatMessage.user_id == current_user_id,
+        ChatMessage.path == path,
+        ChatMessage.role.in_(['user', 'assistant'])
+    ).order_by(ChatMessage.timestamp.desc()).limit(current_app.config['ASSISTANT_HISTORY_WINDOW']).all()
+
+    prompt = [{'role': 'system', 'content': system}] if system else []
+    prompt += [{'role': m.role, 'content': m.content} for m in reversed(window)]
+    prompt.append({'role': 'user', 'content': question})
+
+    cache_key = assistant.cache.key(path, system, question)
+    cached_answer = assistant.cache.get(cache_key)
+
+    def generate():
+        if cached_answer is not None:
+            answer = cached_answer
+            yield _sse('token', {'content': answer})
+        else:
+            chunks = []
+            try:
+                for chunk in assistant.provider.stream(prompt):
+                    chunks.append(chunk)
+                    yield _sse('token', {'content': chunk})
+            except Exception as e:
+                db.session.rollback()
+                print(f"Assistant provider failed: {e}")
+                yield _sse('error', {'message': 'Assistant unavailable, please try again later'})
+                return
+            answer = ''.join(chunks)
+            assistant.cache.set(cache_key, answer)
+
+        # Persist both turns (and a changed system context) in one commit.
+        # The stream may run in a different session than the view, so
+        # nothing is added to the session before this point.
+        if new_system:
+            db.session.add(ChatMessage(user_id=current_user_id, content=system, role='system', path=path))
+        db.session.add(ChatMessage(user_id=current_user_id, content=question, role='user', path=path))
+        reply = ChatMessage(user_id=current_user_id, content=answer, role='assistant', path=path)
+        db.session.add(reply)
+        db.session.commit()
+
+        yield _sse('done', {'message': reply.to_dict(), 'cached': cached_answer is not None})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 from sqlalchemy import and_, desc
 
 from . import dashboard_bp
-from models import User, Visitor
+from models import db, User, Visitor, SchedulerLease
+from models.routing import current_site
+from utils.scheduler import SWEEP_TASK
 
 @dashboard_bp.route('/dashboard/stats', methods=['GET'])
 @jwt_required()
@@ -19,9 +21,9 @@ def get_dashboard_stats():
     
     # Base query depending on user role
     if current_user.role in ['admin', 'security']:
-        base_query = Visitor.query
+        base_query = Visitor.query.filter_by(site=current_site())
     else:
-        base_query = Visitor.query.filter_by(host_id=current_user_id)
+        base_query = Visitor.query.filter_by(site=current_site(), host_id=current_user_id)
     
     # Get basic counts
     total_visitors = base_query.count()
@@ -35,7 +37,7 @@ def get_dashboard_stats():
     
     # Get status distribution
     status_distribution = {status: base_query.filter_by(status=status).count() for status in 
-                           ['pending', 'approved', 'rejected', 'checked_in', 'checked_out']}
+                           ['pending', 'approved', 'rejected', 'checked_in', 'checked_out', 'expired']}
     
     # Get hourly expected visitors (based on approval windows for today)
     hourly_expected = {}
@@ -122,3 +124,17 @@ def get_dashboard_stats():
         'no_photo_count': no_photo_count,
         'recent_checked_out': recent_visitors
     })
+
+
+@dashboard_bp.route('/dashboard/maintenance', methods=['GET'])
+@jwt_required()
+def get_maintenance_stats():
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    # Only admins can see background job stats
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    lease = db.session.get(SchedulerLease, SWEEP_TASK)
+    return jsonify({'visitor_sweep': lease.to_dict() if lease else None})
@@ -0,0 +1,131 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+
+from . import kiosk_bp
+from models import db, User, Visitor
+from models.routing import current_site
+from utils.sync import current_seq, expected_filter, kiosk_dict, changes_since, apply_check_in
+
+def _is_kiosk_user():
+    # Kiosks sign in as security (or admin) users
+    return User.query.get(int(get_jwt_identity())).role in ['admin', 'security']
+
+
+def _parse_scanned_at(value, now):
+    """
+    Local naive time of a scan. Kiosks may send UTC timestamps like
+    ``2025-05-01T09:15:00.000Z`` (JavaScript ``toISOString``).
+    """
+    if not value:
+        return now
+    scanned_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if scanned_at.tzinfo is not None:
+        scanned_at = scanned_at.astimezone().replace(tzinfo=None)
+    return scanned_at
+
+
+@kiosk_bp.route('/kiosk/sync', methods=['GET'])
+@jwt_required()
+def sync_expected_visitors():
+    """
+    Today's expected visitors of the kiosk's site. Without ``since`` this is
+    the full list; with ``?since=<seq>`` only visitors changed after that
+    sequence number, where ``expected: false`` means drop the visitor from
+    the local cache. Keep the returned ``seq`` for the next call and fetch
+    again while ``has_more`` is true. Start over without ``since`` when
+    ``date`` changes.
+    """
+    if not _is_kiosk_user():
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    site = current_site()
+    today = datetime.now().date()
+    since = request.args.get('since', type=int)
+
+    if since is None:
+        # Read the seq first so changes made during the query show up in the next delta
+        seq = current_seq(site)
+        visitors = Visitor.query.filter(Visitor.site == site, expected_filter(today)).all()
+        return jsonify({
+            'site': site,
+            'date': today.isoformat(),
+            'seq': seq,
+            'full': True,
+            'has_more': False,
+            'visitors': [kiosk_dict(visitor) for visitor in visitors]
+        })
+
+    changes, seq, has_more = changes_since(site, since, today, current_app.config['KIOSK_SYNC_PAGE_SIZE'])
+    return jsonify({
+        'site': site,
+        'date': today.isoformat(),
+        'seq': seq,
+        'full': False,
+        'has_more': has_more,
+        'visitors': changes
+    })
+
+
+
+
+@kiosk_bp.route('/kiosk/check-ins', methods=['POST'])
+@jwt_required()
+def post_check_in_events():
+    """
+    Check-ins a kiosk validated locally, sent in a batch.
+    Expected JSON payload:
+    {
+        "events": [
+            {"visitor_id": 1, "scanned_at": "2024-05-01T09:15:00"}
+        ]
+    }
+    Returns the outcome per event: checked_in, already_checked_in, expired,
+    not_approved, not_found or invalid.
+    """
+    if not _is_kiosk_user():
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    events = (request.json or {}).get('events', [])
+    if not isinstance(events, list) or not events:
+        return jsonify({'message': 'At least one event is required'}), 400
+    if len(events) > current_app.config['KIOSK_MAX_EVENTS']:
+        return jsonify({'message': 'Too many events in one batch'}), 400
+
+    now = datetime.now()
+    # bool is an int subclass, but not a visitor id
+    visitor_ids = [
+        event['visitor_id'] for event in events
+        if isinstance(event, dict) and type(event.get('visitor_id')) is int
+    ]
+    visitors = {
+        visitor.id: visitor
+        for visitor in Visitor.query.filter(Visitor.site == current_site(), Visitor.id.in_(visitor_ids))
+    }
+
+    results = []
+    for event in events:
+        visitor_id = event.get('visitor_id') if isinstance(event, dict) else None
+        if type(visitor_id) is not int:
+            results.append({'visitor_id': visitor_id, 'result': 'invalid'})
+            continue
+        try:
+            scanned_at = _parse_scanned_at(event.get('scanned_at'), now)
+        except (AttributeError, TypeError, ValueError):
+            results.append({'visitor_id': visitor_id, 'result': 'invalid'})
+            continue
+
+        visitor = visitors.get(visitor_id)
+        if visitor is None:
+            results.append({'visitor_id': visitor_id, 'result': 'not_found'})
+            continue
+
+        # Scans from the future are clock skew on the kiosk
+        results.append({'visitor_id': visitor_id, 'result': apply_check_in(visitor, min(scanned_at, now))})
+
+    db.session.commit()
+
+    return jsonify({
+        'checked_in': sum(1 for result in results if result['result'] == 'checked_in'),
+        'results': results
+    })
@@ -1,11 +1,20 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+import json
+import os
+import time
+import uuid
 from . import meeting_bp  # Ensure you have created a Blueprint named meeting_bp
-from models import db, User, MeetingRequest, MeetingRecipient
+from models import db, User, MeetingRequest, MeetingRecipient, GraphJob
+from models.routing import current_site
+from utils.graph_jobs import graph_job_runner
+from utils.idempotency import idempotent
+from utils.sites import get_for_site_or_404
 
 @meeting_bp.route('/meetings/request', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_meeting_request():
     """
     Create a meeting request with one or more recipients.
@@ -171,7 +180,7 @@ def start_call(meeting_id):
     Only the sender (requestor) is allowed to start the call.
     """
     current_user_id = get_jwt_identity()
-    meeting = MeetingRequest.query.get_or_404(meeting_id)
+    meeting = get_for_site_or_404(MeetingRequest, id=meeting_id)
     
     # Only allow the requestor to start the call.
     if meeting.requestor_id != current_user_id:
@@ -181,3 +190,207 @@ def start_call(meeting_id):
     db.session.commit()
 
     return jsonify({'message': 'Call started successfully', 'meeting': meeting.to_dict()}), 200
+
+
+# --- Knowledge graphs from recorded meeting audio ---
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _is_participant(meeting, user_id):
+    return meeting.requestor_id == user_id or any(r.recipient_id == user_id for r in meeting.recipients)
+
+
+def _get_job_for_user(job_id):
+    """
+    Return (job, None) if the current user may see the job, else (None, error response).
+    """
+    user_id = int(get_jwt_identity())
+    job = GraphJob.query.get_or_404(job_id)
+    if job.requested_by != user_id and User.query.get(user_id).role != 'admin':
+        return None, (jsonify({'message': 'Unauthorized'}), 403)
+    return job, None
+
+
+def _new_job(meeting_id):
+    meeting = get_for_site_or_404(MeetingRequest, id=meeting_id)
+    user_id = int(get_jwt_identity())
+    if not _is_participant(meeting, user_id):
+        return None, (jsonify({'message': 'Unauthorized'}), 403)
+
+    folder = current_app.config['GRAPH_AUDIO_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    job = GraphJob(
+        meeting_id=meeting.id,
+        site=current_site(),
+        requested_by=user_id,
+        audio_path=os.path.join(folder, f"{uuid.uuid4().hex}.audio")
+    )
+    db.session.add(job)
+    db.session.flush()  # Flush to obtain job.id
+    return job, None
+
+
+def _queue(job):
+    job.status = 'queued'
+    db.session.commit()
+    graph_job_runner.notify()
+
+
+@meeting_bp.route('/meetings/<int:meeting_id>/graph-jobs', methods=['POST'])
+@jwt_required()
+def create_graph_job(meeting_id):
+    """
+    Start a chunked audio upload for a meeting. Send the audio with
+    ``PUT /graph-jobs/<job_id>/audio``.
+    """
+    job, error = _new_job(meeting_id)
+    if error:
+        return error
+    db.session.commit()
+    return jsonify({'job': job.to_dict()}), 201
+
+
+@meeting_bp.route('/graph-jobs/<int:job_id>/audio', methods=['PUT'])
+@jwt_required()
+def upload_graph_audio(job_id):
+    """
+    Append one chunk of audio (the raw request body) to an upload.
+    Query parameters:
+        offset: byte offset of this chunk, must match bytes_received
+        final:  'true' on the last chunk to queue the job for processing
+    Retrying a chunk that was already stored is a no-op.
+    """
+    job, error = _get_job_for_user(job_id)
+    if error:
+        return error
+    if job.status != 'uploading':
+        return jsonify({'message': 'Upload already completed', 'job': job.to_dict()}), 409
+
+    offset = request.args.get('offset', job.bytes_received, type=int)
+    final = request.args.get('final', 'false').lower() == 'true'
+    length = request.content_length or 0
+
+    if offset + length <= job.bytes_received and offset < job.bytes_received:
+        # Retry of a chunk we already have
+        if final:
+            _queue(job)
+        return jsonify({'job': job.to_dict()}), 200
+    if offset != job.bytes_received:
+        return jsonify({'message': 'Unexpected offset', 'expected_offset': job.bytes_received}), 409
+    max_bytes = current_app.config['GRAPH_MAX_AUDIO_BYTES']
+    if job.bytes_received + length > max_bytes:
+        return jsonify({'message': 'Audio file too large'}), 413
+
+    # Stream the body to disk instead of loading it into memory. Chunked
+    # requests have no Content-Length, so the limit is enforced here too.
+    received = 0
+    with open(job.audio_path, 'ab') as f:
+        while True:
+            chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if job.bytes_received + received + len(chunk) > max_bytes:
+                # Drop the partial chunk so the upload can still be resumed
+                f.truncate(job.bytes_received)
+                return jsonify({'message': 'Audio file too large'}), 413
+            f.write(chunk)
+            received += len(chunk)
+
+    job.bytes_received += received
+    if final:
+        _queue(job)
+    else:
+        db.session.commit()
+    return jsonify({'job': job.to_dict()}), 200
+
+
+@meeting_bp.route('/graph', methods=['POST'])
+@jwt_required()
+def create_graph_from_upload():
+    """
+    One-shot upload: multipart form with the audio as ``audio`` (or ``file``)
+    and the ``meeting_id``. Returns 202 with the queued job to poll.
+    """
+    max_bytes = current_app.config['GRAPH_MAX_AUDIO_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({'message': 'Audio file too large'}), 413
+    # Bounds chunked requests too, before the form is parsed and spooled
+    request.max_content_length = max_bytes
+
+    audio = request.files.get('audio') or request.files.get('file')
+    meeting_id = request.form.get('meeting_id', type=int)
+    if audio is None or meeting_id is None:
+        return jsonify({'message': 'Audio file and meeting_id are required'}), 400
+
+    job, error = _new_job(meeting_id)
+    if error:
+        return error
+    audio.save(job.audio_path)  # Werkzeug copies the spooled upload in chunks
+    job.bytes_received = os.path.getsize(job.audio_path)
+    if job.bytes_received > max_bytes:
+        os.remove(job.audio_path)
+        db.session.rollback()
+        return jsonify({'message': 'Audio file too large'}), 413
+    _queue(job)
+    return jsonify({'job': job.to_dict()}), 202
+
+
+@meeting_bp.route('/graph-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_graph_job(job_id):
+    job, error = _get_job_for_user(job_id)
+    if error:
+        return error
+    if job.status == 'queued':
+        # Make sure a dispatcher is running in this worker
+        graph_job_runner.ensure_started()
+    return jsonify({'job': job.to_dict(include_result=job.status == 'done')}), 200
+
+
+@meeting_bp.route('/graph-jobs/<int:job_id>/events', methods=['GET'])
+@jwt_required()
+def stream_graph_job_events(job_id):
+    """
+    Server-sent ``status`` events whenever the job changes, ending with the
+    result once it is done or failed.
+    """
+    job, error = _get_job_for_user(job_id)
+    if error:
+        return error
+    graph_job_runner.ensure_started()
+    interval = current_app.config['GRAPH_EVENTS_POLL_SECONDS']
+
+    def generate():
+        last_status = None
+        while True:
+            current = db.session.get(GraphJob, job_id, populate_existing=True)
+            db.session.commit()  # End the read transaction so the next poll sees new rows
+            if current.status != last_status:
+                last_status = current.status
+                finished = current.status in ('done', 'failed')
+                yield f"event: status\ndata: {json.dumps(current.to_dict(include_result=finished))}\n\n"
+                if finished:
+                    return
+            time.sleep(interval)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@meeting_bp.route('/meetings/<int:meeting_id>/graph', methods=['GET'])
+@jwt_required()
+def get_meeting_graph(meeting_id):
+    """
+    Latest knowledge graph of a meeting, served from the per-meeting cache.
+    """
+    meeting = get_for_site_or_404(MeetingRequest, id=meeting_id)
+    if not _is_participant(meeting, int(get_jwt_identity())):
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    result = graph_job_runner.meeting_result(current_site(), meeting_id)
+    if result is None:
+        return jsonify({'message': 'No knowledge graph for this meeting yet'}), 404
+    return jsonify(result), 200
@@ -0,0 +1,29 @@
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from . import occupancy_bp
+from models import User, OnSiteVisitor
+from models.routing import current_site
+from utils.occupancy import snapshot
+
+@occupancy_bp.route('/occupancy', methods=['GET'])
+@jwt_required()
+def get_occupancy():
+    """
+    Who is in the building right now, from the incrementally maintained
+    counters. Pass ``?roll_call=true`` to include every on-site visitor,
+    e.g. for an evacuation roll call.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    
+    # Only admins and security can see site-wide occupancy
+    if current_user.role not in ['admin', 'security']:
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    site = current_site()
+    data = snapshot(site)
+    if request.args.get('roll_call', 'false').lower() == 'true':
+        visitors = OnSiteVisitor.query.filter_by(site=site).order_by(OnSiteVisitor.full_name).all()
+        data['visitors'] = [visitor.to_dict() for visitor in visitors]
+    
+    return jsonify(data)
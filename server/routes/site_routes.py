@@ -0,0 +1,84 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
+
+from . import site_bp
+from models import db, User, Visitor
+from utils.sites import known_sites, fan_out
+
+
+def _require_admin():
+    current_user = User.query.get(get_jwt_identity())
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized'}), 403
+    return None
+
+
+@site_bp.route('/sites', methods=['GET'])
+@jwt_required()
+def get_sites():
+    """
+    List the configured sites (admin only).
+    """
+    unauthorized = _require_admin()
+    if unauthorized:
+        return unauthorized
+
+    databases = current_app.config['SITE_DATABASES']
+    return jsonify({'sites': [
+        {'name': site, 'own_database': site in databases} for site in known_sites()
+    ]})
+
+
+@site_bp.route('/sites/visitors', methods=['GET'])
+@jwt_required()
+def get_all_site_visitors():
+    """
+    Cross-site visitor list (admin only). Queries every site in parallel and
+    merges the results. Optional query parameters: ``status`` and ``limit``
+    (per site, default 500).
+    """
+    unauthorized = _require_admin()
+    if unauthorized:
+        return unauthorized
+
+    status = request.args.get('status')
+    limit = request.args.get('limit', 500, type=int)
+
+    def site_visitors(site):
+        query = Visitor.query.filter_by(site=site)
+        if status:
+            query = query.filter_by(status=status)
+        return [v.to_dict() for v in query.order_by(Visitor.id.desc()).limit(limit).all()]
+
+    results = fan_out(site_visitors)
+    return jsonify({
+        'visitors': [visitor for site in results for visitor in results[site]],
+        'counts': {site: len(visitors) for site, visitors in results.items()}
+    })
+
+
+@site_bp.route('/sites/stats', methods=['GET'])
+@jwt_required()
+def get_all_site_stats():
+    """
+    Visitor status counts per site and in total (admin only), computed with
+    one GROUP BY per site, run in parallel.
+    """
+    unauthorized = _require_admin()
+    if unauthorized:
+        return unauthorized
+
+    def site_counts(site):
+        rows = db.session.query(Visitor.status, func.count(Visitor.id)) \
+            .filter(Visitor.site == site) \
+            .group_by(Visitor.status).all()
+        return dict(rows)
+
+    results = fan_out(site_counts)
+    totals = {}
+    for counts in results.values():
+        for status, count in counts.items():
+            totals[status] = totals.get(status, 0) + count
+
+    return jsonify({'sites': results, 'totals': totals})
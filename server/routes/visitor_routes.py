@@ -1,13 +1,22 @@
-from flask import request, jsonify
+import os
+
+from flask import request, jsonify, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from sqlalchemy import update
 
 from . import visitor_bp
 from models import db, User, Visitor
+from models.routing import current_site
 from utils.helpers import generate_qr_code, save_photo, generate_badge_id
+from utils.idempotency import idempotent
+from utils.occupancy import record_check_in, record_check_out
+from utils.sites import get_for_site_or_404
+from utils.sync import log_visitor_changes
 
 @visitor_bp.route('/visitors/not-pre-approve', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_visitor():
     data = request.json
     current_user_id = get_jwt_identity()
@@ -50,13 +59,16 @@ def create_visitor():
 @jwt_required()
 def approve_visitor(visitor_id):
     current_user_id = get_jwt_identity()
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
     
     # Check if the current user is the host or an admin
     if visitor.host_id != current_user_id and User.query.get(current_user_id).role != 'admin':
         return jsonify({'message': 'Unauthorized'}), 403
     
+    if visitor.status == 'checked_in':
+        record_check_out(visitor)
     visitor.status = 'approved'
+    visitor.approved_at = datetime.now()
     db.session.commit()
 
     print(f"approval QR code sent to {visitor.email or visitor.phone}")
@@ -73,12 +85,14 @@ def approve_visitor(visitor_id):
 @jwt_required()
 def reject_visitor(visitor_id):
     current_user_id = get_jwt_identity()
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
     
     # Check if the current user is the host or an admin
     if visitor.host_id != current_user_id and User.query.get(current_user_id).role != 'admin':
         return jsonify({'message': 'Unauthorized'}), 403
     
+    if visitor.status == 'checked_in':
+        record_check_out(visitor)
     visitor.status = 'rejected'
     db.session.commit()
 
@@ -89,10 +103,110 @@ def reject_visitor(visitor_id):
 
 
 
+# Statuses a visitor may be moved from by the batch endpoint
+BATCH_TRANSITIONS = {
+    'approved': ['pending'],
+    'rejected': ['pending', 'approved'],
+}
+
+
+@visitor_bp.route('/visitors/batch-status', methods=['PUT'])
+@jwt_required()
+def batch_update_visitor_status():
+    """
+    Approve or reject many visitors at once.
+    Expected JSON payload:
+    {
+        "visitor_ids": [1, 2, 3],
+        "status": "approved"
+    }
+    Returns the outcome per id: updated, not_found, unauthorized or
+    invalid_status (the visitor's current status doesn't allow the change).
+    """
+    data = request.json or {}
+    visitor_ids = data.get('visitor_ids', [])
+    status = data.get('status')
+
+    if status not in BATCH_TRANSITIONS:
+        return jsonify({'message': 'Status must be approved or rejected'}), 400
+    if not visitor_ids or not isinstance(visitor_ids, list):
+        return jsonify({'message': 'At least one visitor id is required'}), 400
+    # bool is an int subclass, but not a visitor id
+    if any(type(visitor_id) is not int for visitor_id in visitor_ids):
+        return jsonify({'message': 'Visitor ids must be integers'}), 400
+    if len(visitor_ids) > current_app.config['VISITOR_BATCH_LIMIT']:
+        return jsonify({'message': 'Too many visitors in one batch'}), 400
+
+    current_user_id = int(get_jwt_identity())
+    is_admin = User.query.get(current_user_id).role == 'admin'
+
+    # One query for authorization and outcomes of the whole batch
+    rows = db.session.query(Visitor.id, Visitor.host_id, Visitor.status).filter(
+        Visitor.site == current_site(),
+        Visitor.id.in_(visitor_ids)
+    ).all()
+    found = {row.id: row for row in rows}
+    allowed_ids = [row.id for row in rows if is_admin or row.host_id == current_user_id]
+
+    values = {'status': status}
+    if status == 'approved':
+        values['approved_at'] = datetime.now()
+
+    updated_ids = set()
+    if allowed_ids:
+        # Set-based UPDATE, restricted again to rows whose status allows it
+        # in case they changed since the SELECT
+        result = db.session.execute(
+            update(Visitor)
+            .where(
+                Visitor.id.in_(allowed_ids),
+                Visitor.status.in_(BATCH_TRANSITIONS[status])
+            )
+            .values(**values)
+            .returning(Visitor.id, Visitor.site, Visitor.email, Visitor.phone)
+            .execution_options(synchronize_session=False)
+        ).all()
+        log_visitor_changes((row.id, row.site) for row in result)
+        db.session.commit()
+        updated_ids = {row.id for row in result}
+        notify_batch_status(status, result)
+
+    outcomes = {}
+    for visitor_id in visitor_ids:
+        if visitor_id not in found:
+            outcomes[visitor_id] = {'result': 'not_found'}
+        elif visitor_id in updated_ids:
+            outcomes[visitor_id] = {'result': 'updated', 'status': status}
+        elif visitor_id not in allowed_ids:
+            outcomes[visitor_id] = {'result': 'unauthorized'}
+        else:
+            outcomes[visitor_id] = {'result': 'invalid_status', 'status': found[visitor_id].status}
+
+    return jsonify({
+        'message': f"{len(updated_ids)} visitor(s) {status}",
+        'updated': len(updated_ids),
+        'results': outcomes
+    })
+
+
+def notify_batch_status(status, visitors):
+    # Placeholder for actual notification logic, queued once per batch
+    if not visitors:
+        return
+    recipients = ', '.join(v.email or v.phone or str(v.id) for v in visitors)
+    kind = 'approval QR code' if status == 'approved' else 'rejection'
+    print(f"{kind} sent to {len(visitors)} visitor(s): {recipients}")
+
+
+
+
 @visitor_bp.route('/visitors/<int:visitor_id>/check-in', methods=['PUT'])
 @jwt_required()
 def check_in_visitor(visitor_id):
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
+    
+    if visitor.status == 'expired':
+        return jsonify({'message': 'Approval Window Expired'}), 400
     
     # Check if visitor is approved
     if visitor.status != 'approved' and visitor.status != 'checked_in':
@@ -110,6 +224,7 @@ def check_in_visitor(visitor_id):
     
     visitor.status = 'checked_in'
     visitor.check_in_time = datetime.now()
+    record_check_in(visitor)
     db.session.commit()
     
     return jsonify({'message': 'Visitor checked in', 'visitor': visitor.to_dict()})
@@ -120,7 +235,7 @@ def check_in_visitor(visitor_id):
 @visitor_bp.route('/visitors/<int:visitor_id>/check-out', methods=['PUT'])
 @jwt_required()
 def check_out_visitor(visitor_id):
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
     
     # Check if visitor is checked in
     if visitor.status != 'checked_in' and visitor.status != 'checked_out':
@@ -131,6 +246,7 @@ def check_out_visitor(visitor_id):
     
     visitor.status = 'checked_out'
     visitor.check_out_time = datetime.now()
+    record_check_out(visitor)
     db.session.commit()
 
     print(f"Thank you for visiting, {visitor.email or visitor.phone}")
@@ -149,10 +265,10 @@ def get_visitors():
     # Filter visitors based on user role
     if current_user.role == 'admin' or current_user.role == 'security':
         # Admins and security can see all visitors
-        visitors = Visitor.query.all()
+        visitors = Visitor.query.filter_by(site=current_site()).all()
     else:
         # Employees can only see their visitors
-        visitors = Visitor.query.filter_by(host_id=current_user_id).all()
+        visitors = Visitor.query.filter_by(site=current_site(), host_id=current_user_id).all()
     
     return jsonify({'visitors': [visitor.to_dict() for visitor in visitors]})
 
@@ -164,7 +280,7 @@ def get_visitors():
 def get_visitor(visitor_id):
     current_user_id = get_jwt_identity()
     current_user = User.query.get(current_user_id)
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
     
     # Check if the current user has access to this visitor
     if current_user.role not in ['admin', 'security'] and visitor.host_id != current_user_id:
@@ -173,10 +289,33 @@ def get_visitor(visitor_id):
     return jsonify({'visitor': visitor.to_dict()})
 
 
+@visitor_bp.route('/visitors/<int:visitor_id>/photo', methods=['GET'])
+@jwt_required()
+def get_visitor_photo(visitor_id):
+    """
+    Serve a visitor's photo, e.g. for kiosks to show next to a scanned badge.
+    """
+    current_user_id = int(get_jwt_identity())
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
+    if visitor.host_id != current_user_id and User.query.get(current_user_id).role not in ['admin', 'security']:
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    # Only ever serve files from the upload folder
+    upload_folder = os.path.realpath(current_app.config['UPLOAD_FOLDER'])
+    path = os.path.realpath(visitor.photo_path) if visitor.photo_path else None
+    if not path or os.path.dirname(path) != upload_folder or not os.path.isfile(path):
+        return jsonify({'message': 'Visitor has no photo'}), 404
+
+    response = send_file(path, conditional=True, max_age=3600)
+    response.cache_control.private = True
+    return response
+
+
 
 
 @visitor_bp.route('visitors/pre-approve', methods=['POST'])
 @jwt_required()
+@idempotent
 def pre_approve_visitor():
     data = request.json
     current_user_id = get_jwt_identity()
@@ -216,6 +355,7 @@ def pre_approve_visitor():
         photo_path=photo_path,
         badge_id=badge_id,
         status='approved',
+        approved_at=datetime.now(),
         pre_approved=True,
         approval_window_start=datetime.fromisoformat(data['approval_window_start']),
         approval_window_end=datetime.fromisoformat(data['approval_window_end'])
@@ -239,12 +379,14 @@ def pre_approve_visitor():
 @jwt_required()
 def set_visitor_pending(visitor_id):
     current_user_id = get_jwt_identity()
-    visitor = Visitor.query.get_or_404(visitor_id)
+    visitor = get_for_site_or_404(Visitor, id=visitor_id)
     
     # Check if the current user is the host or an admin
     if visitor.host_id != current_user_id and User.query.get(current_user_id).role != 'admin':
         return jsonify({'message': 'Unauthorized'}), 403
     
+    if visitor.status == 'checked_in':
+        record_check_out(visitor)
     visitor.status = 'pending'
     db.session.commit()
 
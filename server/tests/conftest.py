@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app the same way app.py and manage.py do, from server/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import Config, config
+from utils.bootstrap import create_schema, seed_admin
+
+
+@pytest.fixture
+def config_overrides():
+    """
+    Extra settings for the test config; override this fixture in a module.
+    """
+    return {}
+
+
+@pytest.fixture
+def test_config(tmp_path, monkeypatch, config_overrides):
+    """
+    Config registered as 'testing', with a temporary database and folders.
+    """
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        UPLOAD_FOLDER = str(tmp_path / 'photos')
+        BADGE_CACHE_FOLDER = str(tmp_path / 'badges')
+        GRAPH_AUDIO_FOLDER = str(tmp_path / 'audio')
+        GRAPH_PIPELINE = 'stub'
+        GRAPH_POLL_SECONDS = 0.1
+        GRAPH_EVENTS_POLL_SECONDS = 0.1
+        ASSISTANT_PROVIDER = 'stub'
+        SCHEDULER_ENABLED = False
+        RATELIMIT_ENABLED = False
+
+    for key, value in config_overrides.items():
+        setattr(TestConfig, key, value)
+    monkeypatch.setitem(config, 'testing', TestConfig)
+    return TestConfig
+
+
+@pytest.fixture
+def app(test_config):
+    app = create_app('testing')
+    with app.app_context():
+        create_schema()
+        seed_admin()
+    yield app
+    app.extensions['graph_job_runner'].shutdown()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """
+    ``login(username, password)`` returns the auth headers for that user.
+    """
+    def login(username='admin', password='admin123'):
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        assert response.status_code == 200
+        return {'Authorization': f"Bearer {response.json['access_token']}"}
+    return login
+
+
+@pytest.fixture
+def register(client):
+    """
+    ``register(username, role='employee', site='default')`` creates a user
+    with password 'secret'.
+    """
+    def register(username, role='employee', site='default'):
+        response = client.post('/api/auth/register', json={
+            'username': username,
+            'email': f"{username}@example.com",
+            'password': 'secret',
+            'role': role,
+            'site': site
+        })
+        assert response.status_code == 200
+    return register
+
+
+@pytest.fixture
+def new_visitor(client):
+    """
+    ``new_visitor(headers, host_id=1)`` registers a pending visitor and
+    returns its dict.
+    """
+    def new_visitor(headers, host_id=1, **fields):
+        response = client.post('/api/visitors/not-pre-approve', headers=headers, json={
+            'full_name': 'Ada Lovelace',
+            'email': 'ada@example.com',
+            'phone': '555-0100',
+            'purpose': 'Interview',
+            'host_id': host_id,
+            **fields
+        })
+        assert response.status_code == 200
+        return response.json['visitor']
+    return new_visitor
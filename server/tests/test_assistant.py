@@ -0,0 +1,67 @@
+import json
+
+from models import ChatMessage
+from utils.assistant import assistant
+
+
+def _events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        event, data = block.split('\n', 1)
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_stream_sends_tokens_and_persists_both_turns(app, client, login):
+    headers = login()
+    response = client.post('/api/chat/stream', headers=headers, json={
+        'content': 'How do I check in?',
+        'path': '/visitors',
+        'system': 'Visitor list page'
+    })
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = _events(response)
+    tokens = ''.join(data['content'] for event, data in events if event == 'token')
+    assert tokens == 'You asked: How do I check in?'
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['cached'] is False
+
+    with app.app_context():
+        messages = ChatMessage.query.filter_by(path='/visitors').order_by(ChatMessage.id).all()
+        assert [m.role for m in messages] == ['system', 'user', 'assistant']
+        assert messages[2].content == tokens
+
+
+def test_repeated_question_is_served_from_cache(client, login, monkeypatch):
+    headers = login()
+    payload = {'content': 'Where is reception?', 'path': '/dashboard'}
+    first = _events(client.post('/api/chat/stream', headers=headers, json=payload))
+    assert first[-1][1]['cached'] is False
+
+    def unavailable(messages):
+        raise AssertionError('provider should not be called')
+    monkeypatch.setattr(assistant.provider, 'stream', unavailable)
+
+    events = _events(client.post('/api/chat/stream', headers=headers, json=payload))
+    assert events[0] == ('token', {'content': 'You asked: Where is reception?'})
+    assert events[-1][1]['cached'] is True
+
+
+def test_provider_failure_stores_nothing(app, client, login, monkeypatch):
+    def failing(messages):
+        raise RuntimeError('upstream down')
+        yield
+    monkeypatch.setattr(assistant.provider, 'stream', failing)
+
+    events = _events(client.post('/api/chat/stream', headers=login(), json={'content': 'Hello?'}))
+
+    assert events == [('error', {'message': 'Assistant unavailable, please try again later'})]
+    with app.app_context():
+        assert ChatMessage.query.count() == 0
+
+
+def test_empty_message_is_rejected(client, login):
+    response = client.post('/api/chat/stream', headers=login(), json={'content': '  '})
+    assert response.status_code == 400
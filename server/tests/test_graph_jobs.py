@@ -0,0 +1,145 @@
+import io
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, GraphJob
+from utils.graph_jobs import GraphPipeline, HttpPipeline
+
+
+def _meeting(client, headers):
+    response = client.post('/api/meetings/request', headers=headers, json={
+        'recipients': [1],
+        'purpose': 'Planning',
+        'schedule_start': '2030-01-01T09:00:00',
+        'schedule_end': '2030-01-01T10:00:00',
+        'google_meet_link': 'https://meet.example.com/abc'
+    })
+    assert response.status_code == 200
+    return response.json['meeting']
+
+
+def _wait_for_job(client, headers, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/graph-jobs/{job_id}", headers=headers).json['job']
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_chunked_upload_produces_graph(client, login):
+    headers = login()
+    meeting = _meeting(client, headers)
+    job = client.post(f"/api/meetings/{meeting['id']}/graph-jobs", headers=headers).json['job']
+
+    first = client.put(f"/api/graph-jobs/{job['id']}/audio?offset=0", headers=headers, data=b'budget review ')
+    assert first.json['job']['bytes_received'] == 14
+    # Retrying a stored chunk is a no-op
+    retry = client.put(f"/api/graph-jobs/{job['id']}/audio?offset=0", headers=headers, data=b'budget review ')
+    assert retry.json['job']['bytes_received'] == 14
+    wrong = client.put(f"/api/graph-jobs/{job['id']}/audio?offset=20", headers=headers, data=b'xx')
+    assert wrong.status_code == 409
+    last = client.put(f"/api/graph-jobs/{job['id']}/audio?offset=14&final=true", headers=headers, data=b'hiring roadmap')
+    assert last.json['job']['status'] == 'queued'
+
+    done = _wait_for_job(client, headers, job['id'])
+    assert done['status'] == 'done'
+    assert done['result']['transcript'] == 'budget review hiring roadmap'
+    assert [node['id'] for node in done['result']['nodes']] == ['budget', 'review', 'hiring', 'roadmap']
+
+    graph = client.get(f"/api/meetings/{meeting['id']}/graph", headers=headers)
+    assert graph.status_code == 200
+    assert graph.json['transcript'] == 'budget review hiring roadmap'
+
+
+def test_one_shot_upload(client, login):
+    headers = login()
+    meeting = _meeting(client, headers)
+    response = client.post('/api/graph', headers=headers, content_type='multipart/form-data', data={
+        'meeting_id': str(meeting['id']),
+        'audio': (io.BytesIO(b'quarterly numbers'), 'meeting.webm')
+    })
+    assert response.status_code == 202
+    assert _wait_for_job(client, headers, response.json['job']['id'])['result']['transcript'] == 'quarterly numbers'
+
+
+def test_upload_size_is_capped_for_chunked_requests(app, client, login):
+    app.config['GRAPH_MAX_AUDIO_BYTES'] = 100
+    headers = login()
+    meeting = _meeting(client, headers)
+    job = client.post(f"/api/meetings/{meeting['id']}/graph-jobs", headers=headers).json['job']
+    client.put(f"/api/graph-jobs/{job['id']}/audio?offset=0", headers=headers, data=b'a' * 80)
+
+    # No Content-Length, as with Transfer-Encoding: chunked
+    response = client.put(
+        f"/api/graph-jobs/{job['id']}/audio",
+        headers={**headers, 'Transfer-Encoding': 'chunked'},
+        input_stream=io.BytesIO(b'b' * 40),
+        environ_overrides={'wsgi.input_terminated': True}
+    )
+    assert response.status_code == 413
+
+    with app.app_context():
+        stored = db.session.get(GraphJob, job['id'])
+        assert stored.bytes_received == 80
+        with open(stored.audio_path, 'rb') as f:
+            assert f.read() == b'a' * 80
+
+
+def test_only_participants_can_start_a_job(client, login, register):
+    meeting = _meeting(client, login())
+    register('outsider')
+    response = client.post(f"/api/meetings/{meeting['id']}/graph-jobs", headers=login('outsider', 'secret'))
+    assert response.status_code == 403
+
+
+def test_stale_jobs_running_here_are_not_requeued(app):
+    dispatcher = app.extensions['graph_job_runner']
+    with app.app_context():
+        started = datetime.utcnow() - timedelta(seconds=app.config['GRAPH_JOB_TIMEOUT'] + 60)
+        job = GraphJob(meeting_id=1, site='default', requested_by=1, audio_path='x.audio',
+                       status='running', started_at=started, attempts=1)
+        db.session.add(job)
+        db.session.commit()
+
+        dispatcher._in_flight.add(job.id)
+        try:
+            dispatcher._requeue_stale()
+            assert db.session.get(GraphJob, job.id, populate_existing=True).status == 'running'
+        finally:
+            dispatcher._in_flight.discard(job.id)
+
+        dispatcher._requeue_stale()
+        assert db.session.get(GraphJob, job.id, populate_existing=True).status == 'queued'
+
+
+def test_newer_result_from_another_worker_replaces_cached_graph(app, client, login):
+    headers = login()
+    meeting = _meeting(client, headers)
+    job = client.post(f"/api/meetings/{meeting['id']}/graph-jobs", headers=headers).json['job']
+    client.put(f"/api/graph-jobs/{job['id']}/audio?offset=0&final=true", headers=headers, data=b'first version')
+    _wait_for_job(client, headers, job['id'])
+    assert client.get(f"/api/meetings/{meeting['id']}/graph", headers=headers).json['transcript'] == 'first version'
+
+    # A job finished by another worker only shows up in the database
+    with app.app_context():
+        db.session.add(GraphJob(
+            meeting_id=meeting['id'], site='default', requested_by=1, audio_path='other.audio',
+            status='done', finished_at=datetime.utcnow() + timedelta(seconds=1),
+            result='{"transcript": "second version", "nodes": [], "edges": [], "html": ""}'
+        ))
+        db.session.commit()
+
+    assert client.get(f"/api/meetings/{meeting['id']}/graph", headers=headers).json['transcript'] == 'second version'
+
+
+def test_pipelines_must_implement_run():
+    class Incomplete(GraphPipeline):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete({})
+    assert HttpPipeline({'GRAPH_PIPELINE_URL': 'http://localhost'}) is not None
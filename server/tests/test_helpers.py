@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from utils.helpers import save_photo, generate_badge_id
+
+PIXEL = 'aGVsbG8='  # Any base64 payload will do
+
+
+@pytest.mark.parametrize('header, extension', [
+    ('data:image/png;base64,', '.png'),
+    ('data:image/jpeg;base64,', '.jpg'),
+    ('data:image/webp;base64,', '.webp'),
+    ('data:text/html;base64,', '.jpg'),
+    ('data:image/../../evil;base64,', '.jpg'),
+    ('', '.jpg'),
+])
+def test_photo_extension_comes_from_an_allowlist(app, header, extension):
+    with app.app_context():
+        path = save_photo(header + PIXEL)
+
+    assert os.path.dirname(path) == app.config['UPLOAD_FOLDER']
+    assert os.path.splitext(path)[1] == extension
+    assert os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_badge_ids_are_unique_after_fork():
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, generate_badge_id().encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_id = os.read(read_end, 100).decode()
+
+    # Same node and counter would only differ by the timestamp part
+    assert child_id.split('-')[2] != generate_badge_id().split('-')[2]
@@ -0,0 +1,50 @@
+from models import Visitor
+
+VISITOR = {
+    'full_name': 'Grace Hopper',
+    'email': 'grace@example.com',
+    'phone': '555-0101',
+    'purpose': 'Meeting',
+    'host_id': 1
+}
+
+
+def _register(client, headers, key=None, body=VISITOR):
+    if key:
+        headers = {**headers, 'Idempotency-Key': key}
+    return client.post('/api/visitors/not-pre-approve', headers=headers, json=body)
+
+
+def test_retry_with_same_key_replays_first_response(app, client, login):
+    headers = login()
+    first = _register(client, headers, 'key-1')
+    second = _register(client, headers, 'key-1')
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.json == first.json
+    with app.app_context():
+        assert Visitor.query.count() == 1
+
+
+def test_same_key_with_different_body_is_rejected(client, login):
+    headers = login()
+    _register(client, headers, 'key-2')
+    response = _register(client, headers, 'key-2', {**VISITOR, 'full_name': 'Someone Else'})
+    assert response.status_code == 422
+
+
+def test_keys_are_scoped_per_user(app, client, login, register):
+    register('host')
+    _register(client, login(), 'shared-key')
+    _register(client, login('host', 'secret'), 'shared-key')
+    with app.app_context():
+        assert Visitor.query.count() == 2
+
+
+def test_requests_without_key_are_not_deduplicated(app, client, login):
+    headers = login()
+    _register(client, headers)
+    _register(client, headers)
+    with app.app_context():
+        assert Visitor.query.count() == 2
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+
+from models import db, Visitor
+from utils.occupancy import snapshot
+
+PIXEL = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=='
+
+
+def _pre_approve(client, headers, start, end):
+    response = client.post('/api/visitors/pre-approve', headers=headers, json={
+        'full_name': 'Pre Approved',
+        'email': 'pre@example.com',
+        'phone': '555-0102',
+        'purpose': 'Workshop',
+        'approval_window_start': start.isoformat(),
+        'approval_window_end': end.isoformat()
+    })
+    assert response.status_code == 200
+    return response.json['visitor']
+
+
+def _sync(client, headers, since=None):
+    url = '/api/kiosk/sync' if since is None else f"/api/kiosk/sync?since={since}"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_full_sync_lists_todays_expected_visitors(client, login, new_visitor):
+    admin = login()
+    now = datetime.now()
+    approved = new_visitor(admin)
+    client.put(f"/api/visitors/{approved['id']}/approve", headers=admin)
+    new_visitor(admin)  # Still pending
+    today = _pre_approve(client, admin, now - timedelta(hours=1), now + timedelta(hours=1))
+    _pre_approve(client, admin, now + timedelta(days=2), now + timedelta(days=3))
+
+    data = _sync(client, admin)
+
+    assert data['full'] is True
+    assert sorted(v['id'] for v in data['visitors']) == sorted([approved['id'], today['id']])
+    visitor = next(v for v in data['visitors'] if v['id'] == approved['id'])
+    assert visitor['badge_url'] == f"/api/badges/{approved['badge_id']}.png"
+    assert 'email' not in visitor and 'photo_path' not in visitor
+    assert visitor['photo_url'] is None
+
+
+def test_walk_ins_are_only_expected_on_the_day_they_were_approved(app, client, login, new_visitor):
+    admin = login()
+    yesterday = new_visitor(admin)
+    client.put(f"/api/visitors/{yesterday['id']}/approve", headers=admin)
+    batch = new_visitor(admin)
+    client.put('/api/visitors/batch-status', headers=admin, json={'visitor_ids': [batch['id']], 'status': 'approved'})
+    with app.app_context():
+        db.session.get(Visitor, yesterday['id']).approved_at = datetime.now() - timedelta(days=1)
+        db.session.commit()
+
+    assert [v['id'] for v in _sync(client, admin)['visitors']] == [batch['id']]
+
+
+def test_kiosk_gets_a_photo_url(client, login, register, new_visitor):
+    admin = login()
+    visitor = new_visitor(admin, photo=PIXEL)
+    client.put(f"/api/visitors/{visitor['id']}/approve", headers=admin)
+
+    synced = _sync(client, admin)['visitors'][0]
+    assert synced['photo_url'] == f"/api/visitors/{visitor['id']}/photo"
+
+    response = client.get(synced['photo_url'], headers=admin)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert 'private' in response.headers['Cache-Control']
+
+    register('security', role='security')
+    assert client.get(synced['photo_url'], headers=login('security', 'secret')).status_code == 200
+    register('employee')
+    assert client.get(synced['photo_url'], headers=login('employee', 'secret')).status_code == 403
+    assert client.get(f"/api/visitors/{visitor['id'] + 1}/photo", headers=admin).status_code == 404
+
+
+def test_delta_returns_changes_after_seq(client, login, new_visitor):
+    admin = login()
+    first = new_visitor(admin)
+    second = new_visitor(admin)
+    seq = _sync(client, admin)['seq']
+    assert _sync(client, admin, seq)['visitors'] == []
+
+    # One change through the ORM, one through the bulk batch endpoint
+    client.put(f"/api/visitors/{first['id']}/approve", headers=admin)
+    client.put('/api/visitors/batch-status', headers=admin, json={'visitor_ids': [second['id']], 'status': 'rejected'})
+
+    delta = _sync(client, admin, seq)
+    assert delta['full'] is False
+    assert delta['seq'] > seq
+    assert [(v['id'], v['expected']) for v in delta['visitors']] == [(first['id'], True), (second['id'], False)]
+    assert _sync(client, admin, delta['seq'])['visitors'] == []
+
+
+def test_delta_is_paged(app, client, login, new_visitor):
+    app.config['KIOSK_SYNC_PAGE_SIZE'] = 1
+    admin = login()
+    visitors = [new_visitor(admin)['id'] for _ in range(2)]
+
+    page = _sync(client, admin, 0)
+    assert page['has_more'] is True
+    assert [v['id'] for v in page['visitors']] == visitors[:1]
+    page = _sync(client, admin, page['seq'])
+    assert page['has_more'] is False
+    assert [v['id'] for v in page['visitors']] == visitors[1:]
+
+
+def test_batched_check_ins(app, client, login, new_visitor):
+    admin = login()
+    approved = new_visitor(admin)
+    pending = new_visitor(admin)
+    client.put(f"/api/visitors/{approved['id']}/approve", headers=admin)
+    seq = _sync(client, admin)['seq']
+
+    scanned_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    response = client.post('/api/kiosk/check-ins', headers=admin, json={'events': [
+        {'visitor_id': approved['id'], 'scanned_at': scanned_at},
+        {'visitor_id': approved['id']},
+        {'visitor_id': pending['id']},
+        {'visitor_id': 999},
+        {'visitor_id': pending['id'], 'scanned_at': 'yesterday'}
+    ]})
+
+    assert response.status_code == 200
+    assert [event['result'] for event in response.json['results']] == [
+        'checked_in', 'already_checked_in', 'not_approved', 'not_found', 'invalid'
+    ]
+    with app.app_context():
+        assert snapshot('default')['total'] == 1
+    # Checked-in visitors are no longer expected at the kiosk
+    assert _sync(client, admin, seq)['visitors'] == [{'id': approved['id'], 'expected': False}]
+
+
+def test_malformed_visitor_ids_are_invalid(client, login, new_visitor):
+    admin = login()
+    visitor = new_visitor(admin)
+    client.put(f"/api/visitors/{visitor['id']}/approve", headers=admin)
+
+    response = client.post('/api/kiosk/check-ins', headers=admin, json={'events': [
+        {'visitor_id': [visitor['id']]},
+        {'visitor_id': {'a': 1}},
+        {'visitor_id': str(visitor['id'])},
+        {'visitor_id': True},
+        'not an event',
+        {'visitor_id': visitor['id']}
+    ]})
+
+    assert response.status_code == 200
+    assert [event['result'] for event in response.json['results']] == ['invalid'] * 5 + ['checked_in']
+
+
+def test_out_of_window_scan_is_refused(client, login):
+    admin = login()
+    now = datetime.now()
+    visitor = _pre_approve(client, admin, now - timedelta(hours=1), now + timedelta(hours=1))
+    response = client.post('/api/kiosk/check-ins', headers=admin, json={'events': [
+        {'visitor_id': visitor['id'], 'scanned_at': (now - timedelta(hours=2)).isoformat()}
+    ]})
+    assert response.json['results'] == [{'visitor_id': visitor['id'], 'result': 'expired'}]
+
+
+def test_kiosk_endpoints_need_security_role(client, login, register):
+    register('employee')
+    register('guard', role='security')
+    employee = login('employee', 'secret')
+
+    assert client.get('/api/kiosk/sync', headers=employee).status_code == 403
+    assert client.post('/api/kiosk/check-ins', headers=employee, json={'events': [{'visitor_id': 1}]}).status_code == 403
+    assert client.get('/api/kiosk/sync', headers=login('guard', 'secret')).status_code == 200
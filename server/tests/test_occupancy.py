@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from models import db, Visitor, OnSiteVisitor
+from utils.occupancy import snapshot, reconcile
+from utils.scheduler import close_stale_check_ins
+
+
+def _checked_in(client, headers, new_visitor, host_id=1):
+    visitor = new_visitor(headers, host_id=host_id)
+    client.put(f"/api/visitors/{visitor['id']}/approve", headers=headers)
+    assert client.put(f"/api/visitors/{visitor['id']}/check-in", headers=headers).status_code == 200
+    return visitor
+
+
+def test_check_in_and_check_out_move_the_counters(client, login, register, new_visitor):
+    admin = login()
+    register('host')
+    first = _checked_in(client, admin, new_visitor)
+    _checked_in(client, admin, new_visitor, host_id=2)
+
+    data = client.get('/api/occupancy', headers=admin).json
+    assert data['total'] == 2
+    assert data['by_host'] == {'1': 1, '2': 1}
+    assert data['by_department'] == {'Administration': 1, '': 1}  # The new host has no department
+
+    client.put(f"/api/visitors/{first['id']}/check-out", headers=admin)
+    data = client.get('/api/occupancy?roll_call=true', headers=admin).json
+    assert data['total'] == 1
+    assert data['by_host'] == {'2': 1}
+    assert [v['host_id'] for v in data['visitors']] == [2]
+
+
+def test_status_changes_of_checked_in_visitors_leave_the_building(client, login, new_visitor):
+    admin = login()
+    visitors = [_checked_in(client, admin, new_visitor) for _ in range(3)]
+
+    client.put(f"/api/visitors/{visitors[0]['id']}/approve", headers=admin)
+    client.put(f"/api/visitors/{visitors[1]['id']}/reject", headers=admin)
+    client.put(f"/api/visitors/{visitors[2]['id']}/pending", headers=admin)
+
+    data = client.get('/api/occupancy?roll_call=true', headers=admin).json
+    assert data['total'] == 0
+    assert data['visitors'] == []
+
+
+def test_reconcile_repairs_drift_after_bulk_sweep(app, client, login, new_visitor):
+    admin = login()
+    stale = _checked_in(client, admin, new_visitor)
+    _checked_in(client, admin, new_visitor)
+
+    with app.app_context():
+        db.session.get(Visitor, stale['id']).check_in_time = datetime.now() - timedelta(days=1)
+        db.session.commit()
+        # The sweep's bulk UPDATE bypasses the counters
+        assert close_stale_check_ins(datetime.now(), timedelta(hours=12), 100) == 1
+        assert snapshot('default')['total'] == 2
+
+        assert reconcile('default') == 1
+        assert snapshot('default')['total'] == 1
+        assert stale['id'] not in [row.visitor_id for row in OnSiteVisitor.query.all()]
+        assert reconcile('default') == 0
+
+
+def test_occupancy_is_for_admins_and_security(client, login, register):
+    register('employee')
+    register('guard', role='security')
+    assert client.get('/api/occupancy', headers=login('employee', 'secret')).status_code == 403
+    assert client.get('/api/occupancy', headers=login('guard', 'secret')).status_code == 200
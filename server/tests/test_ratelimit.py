@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from app import create_app
+from utils.ratelimit import FileBucketStore
+
+
+@pytest.fixture
+def config_overrides():
+    return {
+        'RATELIMIT_ENABLED': True,
+        'RATELIMIT_CAPACITY': 3,
+        'RATELIMIT_REFILL_RATE': 0.001,
+        'RATELIMIT_COSTS': {'visitor.get_visitors': 1},
+        'RATELIMIT_PRIORITIES': {}
+    }
+
+
+def test_caller_is_limited_per_bucket(client, login):
+    headers = login()
+    statuses = [client.get('/api/visitors', headers=headers).status_code for _ in range(3)]
+    limited = client.get('/api/visitors', headers=headers)
+
+    assert statuses == [200, 200, 200]
+    assert limited.status_code == 429
+    assert 'Retry-After' in limited.headers
+
+
+def test_hooks_use_their_own_app_config(app, test_config):
+    # A later app with limiting switched off must not change this app
+    test_config.RATELIMIT_ENABLED = False
+    create_app('testing')
+
+    client = app.test_client()
+    statuses = {client.post('/api/auth/login', json={'username': 'x', 'password': 'y'}).status_code for _ in range(5)}
+    assert 429 in statuses
+
+
+def test_store_errors_fail_open(app, client, login, monkeypatch):
+    headers = login()
+
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(app.extensions['rate_limit_store'], 'consume', locked)
+
+    assert all(client.get('/api/visitors', headers=headers).status_code == 200 for _ in range(5))
+
+
+def test_file_store_reopens_after_fork(tmp_path):
+    store = FileBucketStore(str(tmp_path / 'buckets.db'))
+    store.consume('a', 10, 1.0, 1, 1000.0)
+    parent_conn = store._local.conn
+
+    store._forget_connections()  # What runs in a forked child
+    allowed, remaining = store.consume('a', 10, 1.0, 1, 1000.0)
+
+    assert store._local.conn is not parent_conn
+    assert allowed and remaining == 8
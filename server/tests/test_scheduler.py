@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from models import db, Visitor, VisitorChange
+from utils.scheduler import VisitorSweepScheduler, expire_approvals, close_stale_check_ins
+
+
+def _visitor(**fields):
+    visitor = Visitor(full_name='Sweep Test', host_id=1, **fields)
+    db.session.add(visitor)
+    return visitor
+
+
+def _scheduler(app, owner):
+    scheduler = VisitorSweepScheduler(app)
+    scheduler.owner = owner
+    return scheduler
+
+
+def test_only_one_worker_holds_the_lease(app):
+    first = _scheduler(app, 'worker-a')
+    second = _scheduler(app, 'worker-b')
+    now = datetime.now()
+    expired = now + timedelta(seconds=app.config['SCHEDULER_INTERVAL_SECONDS'] * 2 + 1)
+
+    with app.app_context():
+        assert first.acquire_lease(now) is True
+        assert second.acquire_lease(now) is False
+        assert second.run_once() is None
+        assert first.acquire_lease(now) is True  # Renewal
+
+        # Once the lease runs out another worker takes over
+        assert second.acquire_lease(expired) is True
+        assert first.acquire_lease(expired) is False
+
+
+def test_expire_approvals_in_batches(app):
+    now = datetime.now()
+    with app.app_context():
+        ended = [
+            _visitor(status='approved', pre_approved=True,
+                     approval_window_start=now - timedelta(days=2), approval_window_end=now - timedelta(days=1))
+            for _ in range(5)
+        ]
+        current = _visitor(status='approved', pre_approved=True,
+                           approval_window_start=now - timedelta(hours=1), approval_window_end=now + timedelta(hours=1))
+        walk_in = _visitor(status='approved', pre_approved=False)
+        db.session.commit()
+
+        assert expire_approvals(now, batch_size=2) == 5
+        statuses = {v.id: v.status for v in Visitor.query.all()}
+        assert all(statuses[v.id] == 'expired' for v in ended)
+        assert statuses[current.id] == statuses[walk_in.id] == 'approved'
+        # Bulk updates still reach the kiosk change-log
+        assert {c.visitor_id for c in VisitorChange.query.all()} >= {v.id for v in ended}
+
+
+def test_close_stale_check_ins_in_batches(app):
+    now = datetime.now()
+    with app.app_context():
+        stale = [_visitor(status='checked_in', check_in_time=now - timedelta(days=1)) for _ in range(3)]
+        missing_time = _visitor(status='checked_in', check_in_time=None)
+        recent = _visitor(status='checked_in', check_in_time=now - timedelta(hours=1))
+        db.session.commit()
+
+        assert close_stale_check_ins(now, timedelta(hours=12), batch_size=2) == 4
+        closed = Visitor.query.filter_by(status='checked_out').all()
+        assert {v.id for v in closed} == {v.id for v in stale} | {missing_time.id}
+        assert all(v.check_out_time == now for v in closed)
+        assert db.session.get(Visitor, recent.id).status == 'checked_in'
+
+
+def test_maintenance_shows_last_sweep(app, client, login, register):
+    with app.app_context():
+        stats = _scheduler(app, 'worker-a').run_once()
+    assert stats['expired_approvals'] == 0
+
+    data = client.get('/api/dashboard/maintenance', headers=login()).json['visitor_sweep']
+    assert data['owner'] == 'worker-a'
+    assert data['last_run_at'] is not None
+    assert set(data['last_stats']) >= {
+        'expired_approvals', 'closed_check_ins', 'compacted_changes', 'occupancy_drift',
+        'purged_idempotency_keys', 'duration_ms', 'owner'
+    }
+
+    register('employee')
+    assert client.get('/api/dashboard/maintenance', headers=login('employee', 'secret')).status_code == 403
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+
+from config import config
+from manage import cli
+from models import Visitor
+
+
+@pytest.fixture
+def config_overrides(tmp_path):
+    return {
+        'SITES': ['default', 'hq'],
+        'SITE_DATABASES': {'hq': f"sqlite:///{tmp_path / 'hq.db'}"}
+    }
+
+
+def _tables(path):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_cli_creates_every_site_database(test_config, tmp_path, monkeypatch):
+    # --config choices are fixed at import, so run the test config as the default
+    monkeypatch.setitem(config, 'default', test_config)
+    runner = CliRunner()
+    result = runner.invoke(cli, ['bootstrap'])
+    assert result.exit_code == 0, result.output
+
+    # Site databases only get the site-partitioned tables
+    hq_tables = _tables(tmp_path / 'hq.db')
+    assert {'visitor', 'visitor_change', 'on_site_visitor'} <= hq_tables
+    assert 'user' not in hq_tables
+    assert 'user' in _tables(tmp_path / 'test.db')
+
+    result = runner.invoke(cli, ['migrate'])
+    assert result.exit_code == 0, result.output
+    assert '0 change(s) applied' in result.output
+
+
+def test_migrate_fails_on_columns_it_cannot_add(test_config, tmp_path, monkeypatch):
+    monkeypatch.setitem(config, 'default', test_config)
+    with sqlite3.connect(tmp_path / 'hq.db') as conn:
+        conn.execute('CREATE TABLE visitor (id INTEGER PRIMARY KEY)')
+
+    result = CliRunner().invoke(cli, ['migrate'])
+    assert result.exit_code == 1
+    # Everything else is still applied and reported
+    assert '[hq] added column visitor.email' in result.output
+    assert '[hq] visitor.full_name' in result.output
+    assert 'change(s) applied' not in result.output
+
+
+def test_visitors_are_stored_in_their_site_database(app, client, login, register, new_visitor, tmp_path):
+    register('hq-host', site='hq')
+    hq = login('hq-host', 'secret')
+    visitor = new_visitor(hq, host_id=2)
+
+    assert visitor['site'] == 'hq'
+    with sqlite3.connect(tmp_path / 'hq.db') as conn:
+        assert conn.execute('SELECT site FROM visitor').fetchall() == [('hq',)]
+    with sqlite3.connect(tmp_path / 'test.db') as conn:
+        assert conn.execute('SELECT COUNT(*) FROM visitor').fetchone() == (0,)
+
+    admin = login()
+    assert client.get(f"/api/visitors/{visitor['id']}", headers=admin).status_code == 404
+    assert client.get(f"/api/visitors/{visitor['id']}", headers={**admin, 'X-Site': 'hq'}).status_code == 200
+    assert client.get('/api/visitors', headers=admin).json['visitors'] == []
+    assert [v['id'] for v in client.get('/api/visitors', headers={**admin, 'X-Site': 'hq'}).json['visitors']] == [visitor['id']]
@@ -0,0 +1,15 @@
+def test_visitors_of_other_sites_are_not_found(app, client, login, register, new_visitor):
+    app.config['SITES'] = ['default', 'b']
+    admin = login()
+    visitor = new_visitor(admin)
+    register('guard', role='security', site='b')
+    guard = login('guard', 'secret')
+
+    assert client.get(f"/api/visitors/{visitor['id']}", headers=guard).status_code == 404
+    assert client.put(f"/api/visitors/{visitor['id']}/check-in", headers=guard).status_code == 404
+    assert client.get(f"/api/badges/{visitor['badge_id']}.png", headers=guard).status_code == 404
+    assert client.get('/api/visitors', headers=guard).json['visitors'] == []
+
+    assert client.get(f"/api/visitors/{visitor['id']}", headers=admin).status_code == 200
+    # Admins can act on another site explicitly
+    assert client.get(f"/api/visitors/{visitor['id']}", headers={**admin, 'X-Site': 'b'}).status_code == 404
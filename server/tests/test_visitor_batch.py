@@ -0,0 +1,54 @@
+from models import db, Visitor
+
+
+def _batch(client, headers, visitor_ids, status):
+    return client.put('/api/visitors/batch-status', headers=headers, json={
+        'visitor_ids': visitor_ids,
+        'status': status
+    })
+
+
+def test_outcome_per_visitor(app, client, login, register, new_visitor):
+    admin = login()
+    register('host')
+    own = new_visitor(admin, host_id=2)
+    other = new_visitor(admin, host_id=1)
+    approved = new_visitor(admin, host_id=2)
+    _batch(client, admin, [approved['id']], 'approved')
+
+    response = _batch(client, login('host', 'secret'), [own['id'], other['id'], approved['id'], 999], 'approved')
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 1
+    assert response.json['results'] == {
+        str(own['id']): {'result': 'updated', 'status': 'approved'},
+        str(other['id']): {'result': 'unauthorized'},
+        str(approved['id']): {'result': 'invalid_status', 'status': 'approved'},
+        '999': {'result': 'not_found'}
+    }
+    with app.app_context():
+        assert db.session.get(Visitor, other['id']).status == 'pending'
+
+
+def test_reject_allows_approved_visitors(client, login, new_visitor):
+    admin = login()
+    visitors = [new_visitor(admin)['id'] for _ in range(3)]
+    _batch(client, admin, visitors[:1], 'approved')
+
+    response = _batch(client, admin, visitors, 'rejected')
+    assert response.json['updated'] == 3
+
+
+def test_invalid_requests_change_nothing(app, client, login, new_visitor):
+    admin = login()
+    visitor = new_visitor(admin)
+
+    assert _batch(client, admin, [visitor['id'], str(visitor['id'])], 'rejected').status_code == 400
+    assert _batch(client, admin, [[visitor['id']]], 'rejected').status_code == 400
+    assert _batch(client, admin, [visitor['id']], 'checked_in').status_code == 400
+    assert _batch(client, admin, [], 'approved').status_code == 400
+    app.config['VISITOR_BATCH_LIMIT'] = 2
+    assert _batch(client, admin, [visitor['id']] * 3, 'approved').status_code == 400
+
+    with app.app_context():
+        assert db.session.get(Visitor, visitor['id']).status == 'pending'
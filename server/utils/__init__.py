@@ -1,2 +1,8 @@
 # Import helper functions so they can be accessed from utils package
-from .helpers import save_photo, generate_badge_id
\ No newline at end of file
+from .helpers import save_photo, generate_badge_id, generate_qr_code
+from .badges import badge_renderer
+from .scheduler import visitor_sweep_scheduler
+from .ratelimit import rate_limiter
+from .sites import site_router
+from .assistant import assistant
+from .graph_jobs import graph_job_runner
\ No newline at end of file
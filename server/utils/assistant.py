@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+
+class StubProvider:
+    """
+    Local model for tests and offline development: streams back a canned
+    answer word by word without any network access.
+    """
+
+    def __init__(self, config):
+        self.reply = config.get('ASSISTANT_STUB_REPLY', 'You asked: {question}')
+
+    def stream(self, messages):
+        question = messages[-1]['content'] if messages else ''
+        words = self.reply.format(question=question).split(' ')
+        for i, word in enumerate(words):
+            yield word if i == 0 else ' ' + word
+
+
+class OpenAICompatibleProvider:
+    """
+    Streams completions from an OpenAI-compatible ``/chat/completions`` API
+    (Groq by default) using server-sent events.
+    """
+
+    def __init__(self, config):
+        self.url = config['ASSISTANT_API_URL']
+        self.api_key = config['ASSISTANT_API_KEY']
+        self.model = config['ASSISTANT_MODEL']
+        self.temperature = config.get('ASSISTANT_TEMPERATURE', 0.7)
+        self.max_tokens = config.get('ASSISTANT_MAX_TOKENS', 500)
+        self.timeout = config.get('ASSISTANT_TIMEOUT', 60)
+
+    def stream(self, messages):
+        body = json.dumps({
+            'model': self.model,
+            'messages': messages,
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens,
+            'stream': True
+        }).encode()
+        upstream = urllib.request.Request(self.url, data=body, headers={
+            'Authorization': f"Bearer {self.api_key}",
+            'Content-Type': 'application/json'
+        })
+        with urllib.request.urlopen(upstream, timeout=self.timeout) as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                payload = line[len('data:'):].strip()
+                if payload == '[DONE]':
+                    return
+                delta = json.loads(payload)['choices'][0].get('delta', {})
+                if delta.get('content'):
+                    yield delta['content']
+
+
+PROVIDERS = {
+    'stub': StubProvider,
+    'openai': OpenAICompatibleProvider,
+}
+
+
+def register_provider(name, factory):
+    """
+    Make a provider available as ``ASSISTANT_PROVIDER = name``. ``factory`` is
+    called with the app config and must return an object with a
+    ``stream(messages)`` method yielding text chunks.
+    """
+    PROVIDERS[name] = factory
+
+
+class ResponseCache:
+    """
+    Bounded LRU of assistant answers with a TTL, keyed by a hash of
+    (path, system context, question).
+    """
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, system, question):
+        raw = json.dumps([path or '', system or '', question.strip()])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def set(self, key, answer):
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class Assistant:
+    """
+    Server-side chat assistant: picks the configured provider and caches
+    answers. Bound to the app with ``init_app`` like the other extensions.
+    """
+
+    def __init__(self, app=None):
+        self.provider = None
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.provider = PROVIDERS[app.config['ASSISTANT_PROVIDER']](app.config)
+        self.cache = ResponseCache(app.config['ASSISTANT_CACHE_SIZE'], app.config['ASSISTANT_CACHE_TTL'])
+        app.extensions['assistant'] = self
+
+
+assistant = Assistant()
@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from .helpers import generate_qr_code
+
+BADGE_KINDS = ('qr', 'badge')
+
+
+class BadgeRenderer:
+    """
+    Renders visitor QR codes and printable badges once and keeps the PNGs in a
+    bounded in-memory LRU backed by an on-disk cache keyed by badge id.
+
+    Follows the extension pattern used by ``db``: create the module level
+    instance once and bind it to the app with ``init_app``.
+    """
+
+    def __init__(self, app=None):
+        self.max_entries = 512
+        self.cache_folder = None
+        self.checkin_url = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('BADGE_CACHE_SIZE', 512)
+        self.cache_folder = app.config.get('BADGE_CACHE_FOLDER')
+        self.checkin_url = app.config['BADGE_CHECKIN_URL']
+        app.extensions['badge_renderer'] = self
+
+    def get(self, badge_id, kind='qr'):
+        """
+        Return cached PNG bytes for ``badge_id`` or ``None`` on a miss.
+        Disk hits are promoted into the memory cache.
+        """
+        key = (badge_id, kind)
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                return png
+
+        path = self._disk_path(badge_id, kind)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                png = f.read()
+            self._remember(key, png)
+            return png
+        return None
+
+    def render(self, visitor, kind='qr'):
+        """
+        Return the PNG for ``visitor``, rendering and caching it on a miss.
+        """
+        png = self.get(visitor.badge_id, kind)
+        if png is not None:
+            return png
+
+        qr_png = generate_qr_code(self.checkin_url.format(visitor_id=visitor.id))
+        png = qr_png if kind == 'qr' else self._compose_badge(visitor, qr_png)
+
+        self._remember((visitor.badge_id, kind), png)
+        self._write_disk(visitor.badge_id, kind, png)
+        return png
+
+    def invalidate(self, badge_id):
+        with self._lock:
+            for kind in BADGE_KINDS:
+                self._memory.pop((badge_id, kind), None)
+        for kind in BADGE_KINDS:
+            path = self._disk_path(badge_id, kind)
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _remember(self, key, png):
+        with self._lock:
+            self._memory[key] = png
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, badge_id, kind):
+        if not self.cache_folder:
+            return None
+        # Badge ids only contain [A-Z0-9-], but never trust them as a path
+        safe_id = ''.join(c for c in badge_id if c.isalnum() or c == '-')
+        return os.path.join(self.cache_folder, f"{safe_id}-{kind}.png")
+
+    def _write_disk(self, badge_id, kind, png):
+        path = self._disk_path(badge_id, kind)
+        if not path:
+            return
+        os.makedirs(self.cache_folder, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _compose_badge(visitor, qr_png):
+        from PIL import Image, ImageDraw  # Optional dependency, pulled in by qrcode[pil]
+
+        qr_image = Image.open(io.BytesIO(qr_png)).convert('RGB')
+        width = max(qr_image.width, 320)
+        badge = Image.new('RGB', (width, qr_image.height + 70), 'white')
+        badge.paste(qr_image, ((width - qr_image.width) // 2, 0))
+
+        draw = ImageDraw.Draw(badge)
+        draw.text((10, qr_image.height + 8), visitor.full_name[:40], fill='black')
+        if visitor.company:
+            draw.text((10, qr_image.height + 28), visitor.company[:40], fill='black')
+        draw.text((10, qr_image.height + 48), visitor.badge_id, fill='black')
+
+        buffer = io.BytesIO()
+        badge.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+badge_renderer = BadgeRenderer()
@@ -0,0 +1,123 @@
+import os
+
+from flask import current_app
+from sqlalchemy import inspect, text
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+from models.routing import is_site_partitioned, site_bind_key
+
+
+class SchemaMigrationError(RuntimeError):
+    """
+    Columns that could not be added by ``migrate_schema``. ``applied`` lists
+    the changes that were made anyway, ``skipped`` the columns left out.
+    """
+
+    def __init__(self, applied, skipped):
+        super().__init__("Cannot add NOT NULL columns without a server default: " + ', '.join(skipped))
+        self.applied = applied
+        self.skipped = skipped
+
+
+def ensure_folders():
+    """
+    Create the upload and cache folders used at runtime.
+    """
+    for key in ('UPLOAD_FOLDER', 'BADGE_CACHE_FOLDER', 'GRAPH_AUDIO_FOLDER'):
+        folder = current_app.config.get(key)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+
+def create_schema():
+    """
+    Create every table that does not exist yet, including the
+    site-partitioned tables of sites with their own database.
+    """
+    tables = db.metadata.sorted_tables
+    db.metadata.create_all(bind=db.engine, tables=tables)
+    site_tables = [table for table in tables if is_site_partitioned(table)]
+    for site in current_app.config['SITE_DATABASES']:
+        db.metadata.create_all(bind=db.engines[site_bind_key(site)], tables=site_tables)
+
+
+def migrate_schema():
+    """
+    Bring existing databases up to date with the models: create missing
+    tables, add missing nullable columns and create missing indexes. Sites
+    with their own database only get the site-partitioned tables.
+    Returns a list of the changes that were applied. Raises
+    ``SchemaMigrationError`` if a NOT NULL column without a server default
+    is missing, after applying everything else.
+    """
+    tables = db.metadata.sorted_tables
+    applied, skipped = _migrate_engine(db.engine, tables)
+
+    site_tables = [table for table in tables if is_site_partitioned(table)]
+    for site in current_app.config['SITE_DATABASES']:
+        engine = db.engines[site_bind_key(site)]
+        site_applied, site_skipped = _migrate_engine(engine, site_tables)
+        applied += [f"[{site}] {change}" for change in site_applied]
+        skipped += [f"[{site}] {column}" for column in site_skipped]
+
+    if skipped:
+        raise SchemaMigrationError(applied, skipped)
+    return applied
+
+
+def _migrate_engine(engine, tables):
+    applied = []
+    skipped = []
+
+    existing_tables = set(inspect(engine).get_table_names())
+    db.metadata.create_all(bind=engine, tables=tables)
+
+    for table in tables:
+        if table.name not in existing_tables:
+            applied.append(f"created table {table.name}")
+            continue
+
+        inspector = inspect(engine)
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                skipped.append(f"{table.name}.{column.name}")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+            if column.server_default is not None:
+                default = column.server_default.arg
+                ddl += f" DEFAULT '{default}'" if isinstance(default, str) else f" DEFAULT {default}"
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            applied.append(f"added column {table.name}.{column.name}")
+
+        existing_indexes = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                applied.append(f"created index {index.name}")
+
+    return applied, skipped
+
+
+def seed_admin(username='admin', password='admin123', email='admin@example.com'):
+    """
+    Create the admin user if it doesn't exist. Returns True if it was created.
+    """
+    if User.query.filter_by(username=username).first():
+        return False
+
+    admin = User(
+        username=username,
+        email=email,
+        password=generate_password_hash(password),  # Change this in production
+        department='Administration',
+        role='admin'
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return True
@@ -0,0 +1,342 @@
+import html
+import json
+import multiprocessing
+import os
+import re
+import threading
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from models import db, GraphJob
+
+
+class GraphPipeline(ABC):
+    """
+    Base pipeline: ``run(audio_path)`` returns the transcript, the graph's
+    nodes and edges and its HTML. Runs inside a worker process, so it must
+    not touch the database or the Flask app.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    @abstractmethod
+    def run(self, audio_path):
+        ...
+
+
+class TranscribingPipeline(GraphPipeline):
+    """
+    Pipeline built from two local steps, transcription then graph extraction.
+    """
+
+    @abstractmethod
+    def transcribe(self, audio_path):
+        ...
+
+    @abstractmethod
+    def extract_graph(self, transcript):
+        ...
+
+    def run(self, audio_path):
+        transcript = self.transcribe(audio_path)
+        graph = self.extract_graph(transcript)
+        return {
+            'transcript': transcript,
+            'nodes': graph['nodes'],
+            'edges': graph['edges'],
+            'html': render_graph_html(graph)
+        }
+
+
+class StubPipeline(TranscribingPipeline):
+    """
+    Local pipeline for tests and offline development. The "transcript" is the
+    text found in the uploaded file (or a placeholder for binary audio) and
+    the graph links consecutive keywords.
+    """
+
+    def transcribe(self, audio_path):
+        with open(audio_path, 'rb') as f:
+            data = f.read()
+        text = data.decode('utf-8', errors='ignore')
+        words = re.findall(r"[A-Za-z][A-Za-z'-]{3,}", text)
+        return ' '.join(words) if words else f"Meeting recording ({len(data)} bytes)"
+
+    def extract_graph(self, transcript):
+        keywords = []
+        for word in re.findall(r"[A-Za-z][A-Za-z'-]{3,}", transcript.lower()):
+            if word not in keywords:
+                keywords.append(word)
+        keywords = keywords[:self.config.get('GRAPH_STUB_MAX_NODES', 25)]
+        return {
+            'nodes': [{'id': word, 'label': word} for word in keywords],
+            'edges': [{'source': a, 'target': b} for a, b in zip(keywords, keywords[1:])]
+        }
+
+
+class HttpPipeline(GraphPipeline):
+    """
+    Sends the audio to an external graph service (``GRAPH_PIPELINE_URL``)
+    that does transcription and extraction and answers with the graph JSON.
+    """
+
+    def run(self, audio_path):
+        boundary = uuid.uuid4().hex
+        with open(audio_path, 'rb') as f:
+            audio = f.read()
+        body = (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(audio_path)}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + audio + f"\r\n--{boundary}--\r\n".encode()
+
+        upstream = urllib.request.Request(self.config['GRAPH_PIPELINE_URL'], data=body, headers={
+            'Content-Type': f"multipart/form-data; boundary={boundary}"
+        })
+        with urllib.request.urlopen(upstream, timeout=self.config.get('GRAPH_PIPELINE_TIMEOUT', 600)) as response:
+            return json.loads(response.read())
+
+
+PIPELINES = {
+    'stub': StubPipeline,
+    'http': HttpPipeline,
+}
+
+
+def register_pipeline(name, factory):
+    """
+    Make a pipeline available as ``GRAPH_PIPELINE = name``. ``factory`` is
+    called with a dict of the GRAPH_* settings inside the worker process and
+    must return an object with a ``run(audio_path)`` method.
+    """
+    PIPELINES[name] = factory
+
+
+def render_graph_html(graph):
+    nodes = ''.join(f"<li>{html.escape(node['label'])}</li>" for node in graph['nodes'])
+    edges = ''.join(
+        f"<li>{html.escape(edge['source'])} &rarr; {html.escape(edge['target'])}</li>"
+        for edge in graph['edges']
+    )
+    return f"<div class=\"knowledge-graph\"><h3>Topics</h3><ul>{nodes}</ul><h3>Links</h3><ul>{edges}</ul></div>"
+
+
+def run_pipeline(name, config, audio_path):
+    # Entry point in the worker process
+    return PIPELINES[name](config).run(audio_path)
+
+
+class GraphJobDispatcher:
+    """
+    Process pool, dispatcher thread and result cache of one app. Created by
+    ``GraphJobRunner.init_app`` and kept in ``app.extensions``.
+
+    Every web worker can run a dispatcher thread; jobs are claimed with a
+    conditional UPDATE so each job runs once. Jobs left 'running' by a worker
+    that died are re-queued after ``GRAPH_JOB_TIMEOUT`` seconds, up to
+    ``GRAPH_MAX_ATTEMPTS`` times; jobs still running in this dispatcher's own
+    pool are left alone. Finished results are kept per meeting in a small
+    in-memory LRU, checked against the newest finished job before use.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # (site, meeting_id) -> (job id, result)
+        self._in_flight = set()  # Ids of jobs running in this dispatcher's pool
+
+    def _pipeline_config(self):
+        return {key: value for key, value in self.app.config.items() if key.startswith('GRAPH_')}
+
+    def ensure_started(self):
+        """
+        Start the process pool and dispatcher on first use, so workers that
+        never handle audio don't pay for them.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            context = multiprocessing.get_context(self.app.config['GRAPH_MP_START_METHOD'])
+            self._pool = ProcessPoolExecutor(max_workers=self.app.config['GRAPH_WORKERS'], mp_context=context)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._dispatch_loop, name='graph-jobs', daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """
+        Wake the dispatcher, e.g. after a job was queued.
+        """
+        self.ensure_started()
+        self._wake.set()
+
+    def shutdown(self):
+        """
+        Stop the dispatcher and the pool. Jobs still running are re-queued by
+        another dispatcher once they time out.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.app.config['GRAPH_POLL_SECONDS'])
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                with self.app.app_context():
+                    self._requeue_stale()
+                    while len(self._in_flight) < self.app.config['GRAPH_WORKERS'] and self._claim_next():
+                        pass
+            except Exception as e:
+                print(f"Graph job dispatch failed: {e}")
+
+    def _requeue_stale(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.app.config['GRAPH_JOB_TIMEOUT'])
+        stale = [GraphJob.status == 'running', GraphJob.started_at < cutoff]
+        with self._lock:
+            in_flight = list(self._in_flight)
+        if in_flight:
+            # Slow, not dead: requeueing would run the same audio twice
+            stale.append(GraphJob.id.notin_(in_flight))
+        max_attempts = self.app.config['GRAPH_MAX_ATTEMPTS']
+        db.session.execute(
+            update(GraphJob)
+            .where(*stale, GraphJob.attempts >= max_attempts)
+            .values(status='failed', error='Timed out', finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(GraphJob)
+            .where(*stale, GraphJob.attempts < max_attempts)
+            .values(status='queued')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _claim_next(self):
+        job = GraphJob.query.filter_by(status='queued').order_by(GraphJob.id).first()
+        if job is None:
+            return False
+
+        claimed = db.session.execute(
+            update(GraphJob)
+            .where(GraphJob.id == job.id, GraphJob.status == 'queued')
+            .values(status='running', started_at=datetime.utcnow(), attempts=GraphJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            # Another worker took it, look for the next one
+            return True
+
+        with self._lock:
+            self._in_flight.add(job.id)
+        future = self._pool.submit(
+            run_pipeline, self.app.config['GRAPH_PIPELINE'], self._pipeline_config(), job.audio_path
+        )
+        future.add_done_callback(lambda f, job_id=job.id, key=(job.site, job.meeting_id): self._finish(job_id, key, f))
+        return True
+
+    def _finish(self, job_id, key, future):
+        if future.cancelled():
+            values = None  # Shut down before it ran, the timeout requeues it
+        elif future.exception() is None:
+            result = future.result()
+            values = {'status': 'done', 'result': json.dumps(result), 'error': None, 'finished_at': datetime.utcnow()}
+            self._remember(key, job_id, result)
+        else:
+            values = {'status': 'failed', 'error': str(future.exception())[:255], 'finished_at': datetime.utcnow()}
+
+        try:
+            if values is not None:
+                with self.app.app_context():
+                    db.session.execute(
+                        update(GraphJob)
+                        .where(GraphJob.id == job_id, GraphJob.status == 'running')
+                        .values(**values)
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.session.commit()
+        finally:
+            # Only now, so the job can't be requeued between the two steps
+            with self._lock:
+                self._in_flight.discard(job_id)
+        self._wake.set()
+
+    def _remember(self, key, job_id, result):
+        with self._lock:
+            self._results[key] = (job_id, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.app.config['GRAPH_RESULT_CACHE_SIZE']:
+                self._results.popitem(last=False)
+
+    def meeting_result(self, site, meeting_id):
+        """
+        Latest graph for a meeting. Meeting ids are only unique within a site,
+        so both form the key. The cached graph is only used if no newer job
+        has finished since, e.g. in another worker.
+        """
+        latest = db.session.query(GraphJob.id) \
+            .filter_by(site=site, meeting_id=meeting_id, status='done') \
+            .order_by(GraphJob.finished_at.desc(), GraphJob.id.desc()).first()
+        if latest is None:
+            return None
+
+        key = (site, meeting_id)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] == latest.id:
+                self._results.move_to_end(key)
+                return cached[1]
+
+        result = json.loads(db.session.get(GraphJob, latest.id).result)
+        self._remember(key, latest.id, result)
+        return result
+
+
+class GraphJobRunner:
+    """
+    Runs queued ``GraphJob`` rows on a process pool so minutes-long audio
+    processing never ties up a request worker. Each app gets its own
+    ``GraphJobDispatcher``; the methods below act on the current app's.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['graph_job_runner'] = GraphJobDispatcher(app)
+
+    @staticmethod
+    def dispatcher():
+        return current_app.extensions['graph_job_runner']
+
+    def ensure_started(self):
+        self.dispatcher().ensure_started()
+
+    def notify(self):
+        self.dispatcher().notify()
+
+    def meeting_result(self, site, meeting_id):
+        return self.dispatcher().meeting_result(site, meeting_id)
+
+
+graph_job_runner = GraphJobRunner()
@@ -0,0 +1,100 @@
+import base64
+import io
+import itertools
+import os
+import secrets
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+# Badge ids are built from the current time, a per-process random node and a
+# per-process counter, so they are unique across workers without asking the
+# database which ids are already taken.
+_BADGE_NODE = secrets.token_hex(3).upper()
+_badge_counter = itertools.count()
+_badge_lock = threading.Lock()
+
+
+def _reseed_badge_ids():
+    # Workers forked after import (e.g. gunicorn --preload) would otherwise
+    # share the parent's node and counter
+    global _BADGE_NODE, _badge_counter, _badge_lock
+    _BADGE_NODE = secrets.token_hex(3).upper()
+    _badge_counter = itertools.count()
+    _badge_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_badge_ids)
+
+# Image types accepted for visitor photos; anything else is stored as .jpg
+PHOTO_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+_BASE36 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _to_base36(number):
+    if number == 0:
+        return '0'
+    digits = []
+    while number:
+        number, remainder = divmod(number, 36)
+        digits.append(_BASE36[remainder])
+    return ''.join(reversed(digits))
+
+
+def generate_badge_id(prefix="VIS"):
+    """
+    Return a new badge id such as ``VIS-LZ3K8Q2A-9F1C2B-0004``.
+    """
+    with _badge_lock:
+        sequence = next(_badge_counter)
+    millis = int(time.time() * 1000)
+    return f"{prefix}-{_to_base36(millis)}-{_BADGE_NODE}-{_to_base36(sequence).zfill(4)}"
+
+
+def save_photo(photo_data):
+    """
+    Save a base64 encoded photo (optionally a ``data:`` URL) into the upload
+    folder and return its path, or ``None`` if the payload is empty.
+    """
+    if not photo_data:
+        return None
+
+    extension = 'jpg'
+    if photo_data.startswith('data:'):
+        header, photo_data = photo_data.split(',', 1)
+        mime = header[5:].split(';', 1)[0].strip().lower()
+        # Never build the file name from client text
+        extension = PHOTO_EXTENSIONS.get(mime, 'jpg')
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    filename = f"{uuid.uuid4().hex}.{extension}"
+    path = os.path.join(upload_folder, filename)
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(photo_data))
+    return path
+
+
+def generate_qr_code(data, box_size=8, border=2):
+    """
+    Render ``data`` as a QR code and return the PNG bytes.
+    """
+    import qrcode  # Optional dependency, only needed where QR codes are rendered
+
+    qr = qrcode.QRCode(box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    image = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import request, jsonify, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyKey
+from models.routing import current_site
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Serializes concurrent duplicates within this worker without touching the
+# database; duplicates in other workers wait on the 'in_progress' row instead.
+_key_locks = defaultdict(threading.Lock)
+_key_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _key_locks_guard:
+        return _key_locks[key]
+
+
+def _release_lock(key):
+    with _key_locks_guard:
+        lock = _key_locks.get(key)
+        if lock is not None and not lock.locked():
+            del _key_locks[key]
+
+
+def _replay(record):
+    response = make_response(record.response_body, record.response_status)
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(key, fingerprint, now):
+    """
+    Insert the 'in_progress' row for ``key``. Returns None if this request owns
+    the key, or the existing row.
+    """
+    config = current_app.config
+    try:
+        db.session.add(IdempotencyKey(
+            key=key,
+            fingerprint=fingerprint,
+            expires_at=now + timedelta(seconds=config['IDEMPOTENCY_TTL'])
+        ))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    record = db.session.get(IdempotencyKey, key, populate_existing=True)
+    if record is not None and record.expires_at < now:
+        # Expired keys behave like new ones
+        db.session.delete(record)
+        db.session.commit()
+        return _claim(key, fingerprint, now)
+    return record
+
+
+def _wait_for(key, record):
+    """
+    Wait for another request holding ``key`` to finish. Takes the key over if
+    its owner looks dead. Returns the finished row, or None once taken over.
+    """
+    config = current_app.config
+    deadline = time.monotonic() + config['IDEMPOTENCY_WAIT_SECONDS']
+    while record is not None and record.status == 'in_progress':
+        stale_before = datetime.utcnow() - timedelta(seconds=config['IDEMPOTENCY_LOCK_TIMEOUT'])
+        taken = db.session.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.status == 'in_progress',
+                IdempotencyKey.created_at < stale_before
+            )
+            .values(created_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if taken:
+            return None
+        if time.monotonic() > deadline:
+            return record
+        time.sleep(0.05)
+        record = db.session.get(IdempotencyKey, key, populate_existing=True)
+        db.session.commit()
+    return record
+
+
+def idempotent(view):
+    """
+    Make a POST endpoint safe to retry. Clients send an ``Idempotency-Key``
+    header; the first response (below 500) is stored for ``IDEMPOTENCY_TTL``
+    seconds and replayed for later requests with the same key, user and
+    endpoint. Concurrent duplicates are serialized per key. Reusing a key
+    with a different body is rejected with 422.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not client_key:
+            return view(*args, **kwargs)
+        if len(client_key) > 255:
+            return jsonify({'message': 'Idempotency key too long'}), 400
+
+        scope = f"{get_jwt_identity()}|{current_site()}|{request.endpoint}|{client_key}"
+        key = hashlib.sha256(scope.encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+        try:
+            with _lock_for(key):
+                return _run_once(key, fingerprint, view, args, kwargs)
+        finally:
+            _release_lock(key)
+
+    return wrapper
+
+
+def _run_once(key, fingerprint, view, args, kwargs):
+    record = _claim(key, fingerprint, datetime.utcnow())
+    if record is not None:
+        if record.fingerprint != fingerprint:
+            return jsonify({'message': 'Idempotency key reused with a different request'}), 422
+        record = _wait_for(key, record)
+        if record is not None:
+            if record.status == 'in_progress':
+                return jsonify({'message': 'A request with this idempotency key is still in progress'}), 409
+            return _replay(record)
+
+    try:
+        response = make_response(view(*args, **kwargs))
+    except Exception:
+        db.session.rollback()
+        _forget(key)
+        raise
+
+    if response.status_code >= 500:
+        # Let the client retry failures for real
+        _forget(key)
+        return response
+
+    db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(
+            status='done',
+            response_status=response.status_code,
+            response_body=response.get_data(as_text=True)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return response
+
+
+def _forget(key):
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def purge_idempotency_keys(now, max_keys, batch_size):
+    """
+    Delete expired keys, then the oldest ones beyond ``max_keys``, in batches.
+    Returns the number of deleted rows.
+    """
+    total = 0
+    while True:
+        expired = select(IdempotencyKey.key).where(IdempotencyKey.expires_at < now).limit(batch_size)
+        deleted = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired.scalar_subquery()))
+        ).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            break
+
+    excess = db.session.query(IdempotencyKey).count() - max_keys
+    while excess > 0:
+        oldest = select(IdempotencyKey.key).where(IdempotencyKey.status == 'done') \
+            .order_by(IdempotencyKey.created_at).limit(min(excess, batch_size))
+        deleted = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key.in_(oldest.scalar_subquery()))
+        ).rowcount
+        db.session.commit()
+        total += deleted
+        excess -= deleted
+        if not deleted:
+            break
+    return total
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+from sqlalchemy import update, delete, func
+
+from models import db, User, Visitor, OccupancyCounter, OnSiteVisitor
+
+
+def _bump(site, dimension, value, delta):
+    """
+    Add ``delta`` to one counter with a set-based UPDATE, creating the row on
+    first use. Runs in the caller's transaction.
+    """
+    where = [
+        OccupancyCounter.site == site,
+        OccupancyCounter.dimension == dimension,
+        OccupancyCounter.value == value
+    ]
+    if delta < 0:
+        where.append(OccupancyCounter.count >= -delta)
+
+    updated = db.session.execute(
+        update(OccupancyCounter)
+        .where(*where)
+        .values(count=OccupancyCounter.count + delta, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated or delta < 0:
+        return
+
+    db.session.add(OccupancyCounter(site=site, dimension=dimension, value=value, count=delta))
+    db.session.flush()
+
+
+def _counter_keys(host_id, department):
+    return [('site', ''), ('host', str(host_id)), ('department', department or '')]
+
+
+def record_check_in(visitor):
+    """
+    Add a visitor who just checked in. Call before committing the check-in.
+    """
+    if db.session.get(OnSiteVisitor, visitor.id) is not None:
+        return
+
+    host = User.query.get(visitor.host_id)
+    department = host.department if host else None
+    db.session.add(OnSiteVisitor(
+        visitor_id=visitor.id,
+        site=visitor.site,
+        full_name=visitor.full_name,
+        badge_id=visitor.badge_id,
+        host_id=visitor.host_id,
+        department=department,
+        checked_in_at=visitor.check_in_time
+    ))
+    for dimension, value in _counter_keys(visitor.host_id, department):
+        _bump(visitor.site, dimension, value, 1)
+
+
+def record_check_out(visitor):
+    """
+    Remove a visitor who just left. Call before committing the check-out.
+    """
+    on_site = db.session.get(OnSiteVisitor, visitor.id)
+    if on_site is None:
+        return
+
+    db.session.delete(on_site)
+    for dimension, value in _counter_keys(on_site.host_id, on_site.department):
+        _bump(on_site.site, dimension, value, -1)
+
+
+def snapshot(site):
+    """
+    Current counters of a site, read from the counter table only.
+    """
+    data = {'site': site, 'total': 0, 'by_host': {}, 'by_department': {}, 'updated_at': None}
+    for counter in OccupancyCounter.query.filter_by(site=site).all():
+        if counter.dimension == 'site':
+            data['total'] = counter.count
+            data['updated_at'] = counter.updated_at.isoformat() if counter.updated_at else None
+        elif counter.count:
+            key = 'by_host' if counter.dimension == 'host' else 'by_department'
+            data[key][counter.value] = counter.count
+    return data
+
+
+def reconcile(site):
+    """
+    Rebuild a site's on-site set and counters from the visitor table, e.g.
+    after bulk updates that bypassed the check-in/check-out routes. Returns
+    how many visitors were added to or removed from the on-site set.
+    """
+    checked_in_ids = db.session.query(Visitor.id).filter(
+        Visitor.site == site,
+        Visitor.status == 'checked_in'
+    )
+    removed = db.session.execute(
+        delete(OnSiteVisitor)
+        .where(OnSiteVisitor.site == site, OnSiteVisitor.visitor_id.notin_(checked_in_ids.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    on_site_ids = db.session.query(OnSiteVisitor.visitor_id).filter(OnSiteVisitor.site == site)
+    missing = Visitor.query.filter(
+        Visitor.site == site,
+        Visitor.status == 'checked_in',
+        Visitor.id.notin_(on_site_ids.scalar_subquery())
+    ).all()
+    departments = dict(
+        db.session.query(User.id, User.department)
+        .filter(User.id.in_({v.host_id for v in missing})).all()
+    ) if missing else {}
+    for visitor in missing:
+        db.session.add(OnSiteVisitor(
+            visitor_id=visitor.id,
+            site=site,
+            full_name=visitor.full_name,
+            badge_id=visitor.badge_id,
+            host_id=visitor.host_id,
+            department=departments.get(visitor.host_id),
+            checked_in_at=visitor.check_in_time
+        ))
+    db.session.flush()
+
+    # Recompute the counters from the corrected set
+    now = datetime.utcnow()
+    db.session.execute(delete(OccupancyCounter).where(OccupancyCounter.site == site))
+    total = db.session.query(func.count(OnSiteVisitor.visitor_id)).filter(OnSiteVisitor.site == site).scalar()
+    db.session.add(OccupancyCounter(site=site, dimension='site', value='', count=total, updated_at=now))
+    for column, dimension in ((OnSiteVisitor.host_id, 'host'), (OnSiteVisitor.department, 'department')):
+        rows = db.session.query(column, func.count(OnSiteVisitor.visitor_id)) \
+            .filter(OnSiteVisitor.site == site).group_by(column).all()
+        for value, count in rows:
+            db.session.add(OccupancyCounter(
+                site=site, dimension=dimension, value='' if value is None else str(value),
+                count=count, updated_at=now
+            ))
+    db.session.commit()
+    return removed + len(missing)
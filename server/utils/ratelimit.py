@@ -0,0 +1,237 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request, jsonify, g, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+
+class MemoryBucketStore:
+    """
+    Token buckets kept in this worker's memory. A bucket that has refilled
+    completely is the same as no bucket, so those are dropped once per refill
+    period; beyond ``max_buckets`` the least recently used ones go too.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def consume(self, key, capacity, refill_rate, cost, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+
+            if now - self._last_sweep >= capacity / refill_rate:
+                self._sweep(capacity, refill_rate, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def _sweep(self, capacity, refill_rate, now):
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * refill_rate >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+        self._last_sweep = now
+
+
+class FileBucketStore:
+    """
+    Token buckets kept in a small SQLite file, shared by every worker on the
+    host. Each consume is a single short write transaction.
+
+    Connections are opened lazily per thread and dropped in forked children
+    (e.g. gunicorn --preload), since SQLite handles must not cross a fork.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._last_sweep = time.time()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget_connections)
+
+    def _forget_connections(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # Losing a few buckets on a crash is fine
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, capacity, refill_rate, cost, now):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')  # Raises if the file stays locked; the limiter fails open
+        try:
+            row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                'INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if now - self._last_sweep >= capacity / refill_rate:
+            # Refilled buckets are the same as missing ones
+            self._last_sweep = now
+            conn.execute(
+                'DELETE FROM bucket WHERE tokens + (? - updated) * ? >= ?',
+                (now, refill_rate, capacity)
+            )
+        return allowed, tokens
+
+
+class RateLimiter:
+    """
+    Per-user and per-endpoint rate limiting with load shedding.
+
+    Each caller (JWT identity, or client IP for anonymous endpoints such as
+    login) gets one token bucket per priority class, so polling a dashboard
+    can never drain the budget used for check-ins. Every endpoint costs
+    ``RATELIMIT_COSTS.get(endpoint, 1)`` tokens.
+
+    Endpoints are 'critical', 'normal' or 'low' priority. A class is shed
+    with a 503 once the worker has more requests in flight than its entry in
+    ``RATELIMIT_SHED_LIMITS``; 'critical' has no entry and is never shed, so
+    check-in/check-out keeps working while dashboard polling backs off.
+    Streamed responses (SSE) stop counting as in flight once the view
+    returns, so a few open streams can't shed everything else.
+
+    Anonymous callers are told apart by ``request.remote_addr``; behind a
+    reverse proxy set ``PROXY_FIX_HOPS`` so it is the client's address.
+    """
+
+    def __init__(self, app=None):
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        storage = app.config.get('RATELIMIT_STORAGE', 'memory')
+        if storage.startswith('file:'):
+            store = FileBucketStore(storage[len('file:'):])
+        else:
+            store = MemoryBucketStore(app.config.get('RATELIMIT_MAX_BUCKETS', 10000))
+
+        # Config and buckets are per app, read through current_app on every
+        # request, so hooks of an earlier app never see a later app's state
+        app.extensions['rate_limiter'] = self
+        app.extensions['rate_limit_store'] = store
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _store():
+        return current_app.extensions['rate_limit_store']
+
+    @staticmethod
+    def priority_for(endpoint):
+        return current_app.config['RATELIMIT_PRIORITIES'].get(endpoint, 'normal')
+
+    @staticmethod
+    def cost_for(endpoint):
+        return current_app.config['RATELIMIT_COSTS'].get(endpoint, 1)
+
+    @staticmethod
+    def _caller_key():
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            # Invalid tokens are rejected by the view itself
+            identity = None
+        if identity is not None:
+            return f"user:{identity}"
+        return f"ip:{request.remote_addr}"
+
+    def _before_request(self):
+        config = current_app.config
+        endpoint = request.endpoint
+        if not config['RATELIMIT_ENABLED'] or endpoint in (None, 'static') or request.method == 'OPTIONS':
+            return None
+
+        priority = self.priority_for(endpoint)
+
+        # Load shedding: refuse low priority work first when this worker is busy
+        shed_limit = config['RATELIMIT_SHED_LIMITS'].get(priority)
+        with self._in_flight_lock:
+            if shed_limit is not None and self._in_flight >= shed_limit:
+                response = jsonify({'message': 'Server busy, please retry shortly'})
+                response.status_code = 503
+                response.headers['Retry-After'] = '1'
+                return response
+            self._in_flight += 1
+            g.rate_limit_in_flight = True
+
+        capacity = config['RATELIMIT_CAPACITY']
+        refill_rate = config['RATELIMIT_REFILL_RATE']
+        cost = self.cost_for(endpoint)
+        try:
+            allowed, remaining = self._store().consume(
+                f"{self._caller_key()}:{priority}", capacity, refill_rate, cost, time.time()
+            )
+        except Exception as e:
+            # Fail open: a busy or broken store must not take check-ins down
+            print(f"Rate limit store unavailable: {e}")
+            return None
+        g.rate_limit_remaining = remaining
+
+        if not allowed:
+            response = jsonify({'message': 'Too many requests'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(math.ceil((cost - remaining) / refill_rate))
+            return response
+        return None
+
+    def _after_request(self, response):
+        remaining = g.get('rate_limit_remaining')
+        if remaining is not None:
+            response.headers['X-RateLimit-Remaining'] = str(int(remaining))
+        if response.is_streamed:
+            # Teardown only runs when the stream ends, which may take minutes
+            self._release()
+        return response
+
+    def _teardown_request(self, exc):
+        self._release()
+
+    def _release(self):
+        if g.pop('rate_limit_in_flight', False):
+            with self._in_flight_lock:
+                self._in_flight -= 1
+
+
+rate_limiter = RateLimiter()
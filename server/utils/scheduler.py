@@ -0,0 +1,196 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, select, or_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Visitor, SchedulerLease
+from models.routing import site_scope, MAIN_DATABASE
+from .idempotency import purge_idempotency_keys
+from .occupancy import reconcile as reconcile_occupancy
+from .sites import known_sites
+from .sync import log_visitor_changes, compact_visitor_changes
+
+SWEEP_TASK = 'visitor_sweep'
+
+
+def _bulk_update(where, values, batch_size):
+    """
+    Apply ``values`` to every visitor matching ``where`` with set-based UPDATEs
+    of at most ``batch_size`` rows, committing between batches so the SQLite
+    write lock is never held for long. Updated visitors are added to the kiosk
+    change-log in the same transaction. Returns the number of updated rows.
+    """
+    total = 0
+    while True:
+        batch_ids = select(Visitor.id).where(*where).limit(batch_size)
+        updated = db.session.execute(
+            update(Visitor)
+            .where(Visitor.id.in_(batch_ids.scalar_subquery()))
+            .values(**values)
+            .returning(Visitor.id, Visitor.site)
+            .execution_options(synchronize_session=False)
+        ).all()
+        log_visitor_changes(updated)
+        db.session.commit()
+        total += len(updated)
+        if len(updated) < batch_size:
+            return total
+
+
+def expire_approvals(now, batch_size):
+    """
+    Move pre-approved visitors whose approval window has ended to 'expired'.
+    """
+    return _bulk_update(
+        [
+            Visitor.status == 'approved',
+            Visitor.pre_approved == True,
+            Visitor.approval_window_end < now
+        ],
+        {'status': 'expired'},
+        batch_size
+    )
+
+
+def close_stale_check_ins(now, max_age, batch_size):
+    """
+    Check out visitors that have been checked in for longer than ``max_age``,
+    or whose check-in time is missing and so can never age out.
+    """
+    return _bulk_update(
+        [
+            Visitor.status == 'checked_in',
+            or_(Visitor.check_in_time < now - max_age, Visitor.check_in_time.is_(None))
+        ],
+        {'status': 'checked_out', 'check_out_time': now},
+        batch_size
+    )
+
+
+class VisitorSweepScheduler:
+    """
+    In-process scheduler that periodically expires out-of-window pre-approvals,
+    auto-closes stale check-ins, reconciles the occupancy counters, compacts
+    the kiosk change-log and purges old idempotency keys.
+
+    Every worker starts a scheduler thread, but each run first takes a lease
+    on the ``scheduler_lease`` row, so only one worker sweeps at a time.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['visitor_sweep_scheduler'] = self
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='visitor-sweep', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        interval = self.app.config['SCHEDULER_INTERVAL_SECONDS']
+        while not self._stop.wait(interval):
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                print(f"Visitor sweep failed: {e}")
+
+    def acquire_lease(self, now):
+        """
+        Take (or renew) the sweep lease. Returns True if this worker holds it.
+        """
+        ttl = timedelta(seconds=self.app.config['SCHEDULER_INTERVAL_SECONDS'] * 2)
+
+        if db.session.get(SchedulerLease, SWEEP_TASK) is None:
+            try:
+                db.session.add(SchedulerLease(name=SWEEP_TASK))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created the row first
+                db.session.rollback()
+
+        result = db.session.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == SWEEP_TASK,
+                or_(
+                    SchedulerLease.owner == self.owner,
+                    SchedulerLease.lease_expires_at.is_(None),
+                    SchedulerLease.lease_expires_at < now
+                )
+            )
+            .values(owner=self.owner, lease_expires_at=now + ttl)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def run_once(self):
+        """
+        Run a single sweep if this worker holds the lease. Returns the stats
+        of the run, or ``None`` if another worker owns the lease.
+        """
+        now = datetime.now()
+        if not self.acquire_lease(now):
+            return None
+
+        config = self.app.config
+        started = time.perf_counter()
+        stats = {'expired_approvals': 0, 'closed_check_ins': 0, 'compacted_changes': 0}
+
+        # Sweep the main database, then every site that has its own database
+        for site in [MAIN_DATABASE, *config['SITE_DATABASES']]:
+            with site_scope(site):
+                stats['expired_approvals'] += expire_approvals(now, config['SWEEP_BATCH_SIZE'])
+                stats['closed_check_ins'] += close_stale_check_ins(
+                    now,
+                    timedelta(hours=config['STALE_CHECKIN_HOURS']),
+                    config['SWEEP_BATCH_SIZE']
+                )
+                stats['compacted_changes'] += compact_visitor_changes(config['SWEEP_BATCH_SIZE'])
+
+        # Stale check-ins were closed in bulk, so bring occupancy back in line
+        stats['occupancy_drift'] = 0
+        for site in known_sites():
+            with site_scope(site):
+                stats['occupancy_drift'] += reconcile_occupancy(site)
+
+        stats['purged_idempotency_keys'] = purge_idempotency_keys(
+            datetime.utcnow(), config['IDEMPOTENCY_MAX_KEYS'], config['SWEEP_BATCH_SIZE']
+        )
+
+        stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        stats['owner'] = self.owner
+
+        db.session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == SWEEP_TASK)
+            .values(last_run_at=now, last_stats=json.dumps(stats))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        self.last_run = {'run_at': now.isoformat(), **stats}
+        return stats
+
+
+visitor_sweep_scheduler = VisitorSweepScheduler()
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, g, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from models.routing import (
+    DEFAULT_SITE, current_site, site_bind_key, site_scope, set_current_site, reset_current_site
+)
+
+
+def configure_site_binds(app):
+    """
+    Add a SQLAlchemy bind for every site in ``SITE_DATABASES``. Must run
+    before ``db.init_app``; also used by manage.py, which has no router.
+    """
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for site, uri in app.config['SITE_DATABASES'].items():
+        binds[site_bind_key(site)] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+class SiteRouter:
+    """
+    Resolves the site of every request from the JWT ``site`` claim and makes
+    it the current site, so site-partitioned models are read from and written
+    to that site's database (see ``models.routing.SiteRoutingSession``).
+
+    Sites listed in ``SITE_DATABASES`` get their own SQLAlchemy bind; other
+    sites share the main database and are told apart by their ``site`` column.
+    Admins may act on another site by sending an ``X-Site`` header.
+
+    Must be initialised before ``db.init_app`` so the binds exist.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        configure_site_binds(app)
+        app.extensions['site_router'] = self
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def resolve_site():
+        try:
+            verify_jwt_in_request(optional=True)
+            claims = get_jwt()
+        except Exception:
+            # Invalid tokens are rejected by the view itself
+            claims = {}
+
+        site = claims.get('site', DEFAULT_SITE)
+        requested = request.headers.get('X-Site')
+        if requested and claims.get('role') == 'admin' and requested in known_sites():
+            site = requested
+        return site
+
+    def _before_request(self):
+        g.site_token = set_current_site(self.resolve_site())
+
+    def _teardown_request(self, exc):
+        token = g.pop('site_token', None)
+        if token is not None:
+            reset_current_site(token)
+
+
+def get_for_site_or_404(model, **filters):
+    """
+    Look up one row of a site-partitioned model within the current site,
+    e.g. ``get_for_site_or_404(Visitor, id=visitor_id)``. Rows of other sites
+    sharing the database are treated as missing.
+    """
+    return model.query.filter_by(site=current_site(), **filters).first_or_404()
+
+
+def known_sites():
+    config = current_app.config
+    sites = list(config['SITES'])
+    for site in config['SITE_DATABASES']:
+        if site not in sites:
+            sites.append(site)
+    return sites
+
+
+def fan_out(func, sites=None):
+    """
+    Call ``func(site)`` for every site in parallel, each in its own app
+    context (and so its own session) with that site as the current site.
+    Returns ``{site: result}`` in site order.
+    """
+    app = current_app._get_current_object()
+    sites = sites or known_sites()
+
+    def run(site):
+        with app.app_context(), site_scope(site):
+            return func(site)
+
+    with ThreadPoolExecutor(max_workers=min(len(sites), app.config['SITE_FANOUT_WORKERS'])) as pool:
+        return dict(zip(sites, pool.map(run, sites)))
+
+
+site_router = SiteRouter()
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, or_, and_
+
+from models import db, Visitor, VisitorChange
+from .occupancy import record_check_in
+
+
+def log_visitor_changes(rows):
+    """
+    Log visitors changed by a bulk UPDATE, which skips the ORM events that
+    normally fill the change-log. ``rows`` are ``(id, site)`` pairs; runs in
+    the caller's transaction.
+    """
+    now = datetime.utcnow()
+    values = [{'visitor_id': visitor_id, 'site': site, 'changed_at': now} for visitor_id, site in rows]
+    if values:
+        db.session.execute(insert(VisitorChange), values)
+
+
+def current_seq(site):
+    return db.session.query(func.max(VisitorChange.seq)).filter(VisitorChange.site == site).scalar() or 0
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def expected_filter(day):
+    """
+    Visitors a kiosk should expect on ``day``: approved, walk-ins only if
+    they were approved that day and pre-approved visitors only if their
+    approval window overlaps it.
+    """
+    start, end = _day_bounds(day)
+    return and_(
+        Visitor.status == 'approved',
+        or_(
+            and_(Visitor.pre_approved.isnot(True), Visitor.approved_at >= start, Visitor.approved_at < end),
+            and_(Visitor.approval_window_start < end, Visitor.approval_window_end >= start)
+        )
+    )
+
+
+def is_expected(visitor, day):
+    if visitor.status != 'approved':
+        return False
+    start, end = _day_bounds(day)
+    if not visitor.pre_approved:
+        return bool(visitor.approved_at and start <= visitor.approved_at < end)
+    return bool(
+        visitor.approval_window_start and visitor.approval_window_end
+        and visitor.approval_window_start < end and visitor.approval_window_end >= start
+    )
+
+
+def kiosk_dict(visitor):
+    """
+    What a kiosk needs to validate a scan offline.
+    """
+    return {
+        'id': visitor.id,
+        'full_name': visitor.full_name,
+        'company': visitor.company,
+        'host_id': visitor.host_id,
+        'badge_id': visitor.badge_id,
+        'status': visitor.status,
+        'pre_approved': visitor.pre_approved,
+        'approval_window_start': visitor.approval_window_start.isoformat() if visitor.approval_window_start else None,
+        'approval_window_end': visitor.approval_window_end.isoformat() if visitor.approval_window_end else None,
+        'badge_url': f"/api/badges/{visitor.badge_id}.png" if visitor.badge_id else None,
+        'photo_url': f"/api/visitors/{visitor.id}/photo" if visitor.photo_path else None
+    }
+
+
+def changes_since(site, since, day, limit):
+    """
+    Visitors of ``site`` changed after ``since``, oldest change first, at most
+    ``limit`` of them. Visitors the kiosk should no longer expect come back
+    with ``expected`` false and no other fields. Returns
+    ``(changes, last_seq, has_more)``.
+    """
+    latest = db.session.query(VisitorChange.visitor_id, func.max(VisitorChange.seq).label('seq')) \
+        .filter(VisitorChange.site == site, VisitorChange.seq > since) \
+        .group_by(VisitorChange.visitor_id) \
+        .order_by(func.max(VisitorChange.seq)) \
+        .limit(limit + 1).all()
+    has_more = len(latest) > limit
+    latest = latest[:limit]
+    if not latest:
+        return [], since, False
+
+    visitors = {
+        visitor.id: visitor
+        for visitor in Visitor.query.filter(Visitor.site == site, Visitor.id.in_([row.visitor_id for row in latest]))
+    }
+    changes = []
+    for row in latest:
+        visitor = visitors.get(row.visitor_id)
+        if visitor is not None and is_expected(visitor, day):
+            changes.append({'expected': True, **kiosk_dict(visitor)})
+        else:
+            changes.append({'expected': False, 'id': row.visitor_id})
+    return changes, latest[-1].seq, has_more
+
+
+def apply_check_in(visitor, scanned_at):
+    """
+    Check in a visitor scanned by a kiosk, with the same rules as the
+    check-in route. Returns the outcome; only 'checked_in' changed anything.
+    """
+    if visitor.status == 'expired':
+        return 'expired'
+    if visitor.status == 'checked_in':
+        return 'already_checked_in'
+    if visitor.status != 'approved':
+        return 'not_approved'
+    if visitor.pre_approved and visitor.approval_window_start and visitor.approval_window_end:
+        if not (visitor.approval_window_start <= scanned_at <= visitor.approval_window_end):
+            return 'expired'
+
+    visitor.status = 'checked_in'
+    visitor.check_in_time = scanned_at
+    record_check_in(visitor)
+    return 'checked_in'
+
+
+def compact_visitor_changes(batch_size):
+    """
+    Delete change-log rows that have a newer row for the same visitor, in
+    batches. Returns the number of deleted rows.
+    """
+    total = 0
+    while True:
+        newest = select(func.max(VisitorChange.seq)).group_by(VisitorChange.visitor_id)
+        superseded = select(VisitorChange.seq) \
+            .where(VisitorChange.seq.notin_(newest.scalar_subquery())).limit(batch_size)
+        deleted = db.session.execute(
+            delete(VisitorChange).where(VisitorChange.seq.in_(superseded.scalar_subquery()))
+        ).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total